@@ -2,13 +2,15 @@ import os
 import datetime
 import time
 import requests
-import pandas as pd
 import typer
 from dotenv import load_dotenv
-from autoscraper.utils.logger import info, success, error
+from autoscraper.utils.logger import debug, info, success, error
+from autoscraper.core.throttle import get_scheduler
+from autoscraper.core.browser import get_browser_pool, close_browser_pool
+from autoscraper.core.storage import FORMATS, write_table
+from autoscraper.utils.metrics import get_metrics, record_fetch, record_embedding, llm_call, export_run, profiling
+from autoscraper.utils.cohere_client import get_cohere_client
 import json
-from playwright.sync_api import sync_playwright
-import cohere
 import numpy as np
 from sklearn.cluster import KMeans
 
@@ -20,37 +22,28 @@ app = typer.Typer(help="Phase 6.5: Problem Scraper + AI Teaching Insights")
 BASE_URL = "https://atcoder.jp/contests/"
 PROBLEMSET_URL = "https://kenkoooo.com/atcoder/resources/problems.json"  # AtCoder problem list API
 PROBLEM_PAGE = "https://atcoder.jp/contests/{}/tasks/{}"
+RUN_FOLDER = "phase65_runs"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
 
 # Initialize Cohere client
-COHERE_API_KEY = os.getenv("COHERE_API_KEY")
-if not COHERE_API_KEY:
-    raise RuntimeError("COHERE_API_KEY not found in environment variables!")
-co = cohere.Client(COHERE_API_KEY)
+co = get_cohere_client()
 
 
 # ---------------------------------------------
-# Fetch problem statements with Playwright
+# Fetch problem statements with a warm Playwright browser
 # ---------------------------------------------
 def fetch_problem_html(url, retries=3, backoff=1):
+    pool = get_browser_pool(user_agent=USER_AGENT)
     for attempt in range(1, retries + 1):
         try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                page = browser.new_page()
-                page.set_extra_http_headers({
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
-                })
-                info(f"Fetching problem page: {url} (attempt {attempt})")
-                page.goto(url, timeout=15000)
-                page.wait_for_selector("span.lang-en", timeout=7000)
-                html = page.inner_html("span.lang-en")
-                browser.close()
-                return html
+            debug("Fetching problem page: %s (attempt %d)", url, attempt, url=url, attempt=attempt)
+            return pool.fetch(url, wait_selector="span.lang-en", inner_selector="span.lang-en",
+                              timeout_ms=15000, wait_timeout_ms=7000)
         except Exception as e:
-            error(f"Error fetching {url}: {e}")
+            error("Error fetching %s: %s", url, e, url=url, attempt=attempt)
             if attempt < retries:
                 wait = backoff * (2 ** (attempt - 1))
-                info(f"Retrying in {wait} seconds...")
+                info("Retrying in %s seconds...", wait)
                 time.sleep(wait)
             else:
                 return None
@@ -63,7 +56,9 @@ def cluster_problems_with_cohere(texts, k=5):
     if len(texts) < k:
         k = len(texts)
     info("Generating embeddings for clustering…")
-    embeddings = co.embed(texts=texts, model="large").embeddings
+    start = time.perf_counter()
+    embeddings = llm_call(co.embed, "embed", texts=texts, model="large").embeddings
+    record_embedding("cohere/large", len(texts), time.perf_counter() - start)
     kmeans = KMeans(n_clusters=k, random_state=42)
     clusters = kmeans.fit_predict(embeddings)
     return clusters
@@ -82,79 +77,105 @@ def enhance_problem_with_ai(statement_html):
         f"Problem:\n{statement_html}"
     )
     try:
-        response = co.chat(
+        response = llm_call(
+            co.chat, "chat",
             model="command-r-plus",
             message=prompt,
             temperature=0.4
         )
         return response.text.strip()
     except Exception as e:
-        error(f"Teaching transformation failed: {e}")
+        error("Teaching transformation failed: %s", e)
         return ""
 
 
 # ---------------------------------------------
 # Main pipeline
 # ---------------------------------------------
-@app.command()
-def run_pipeline(max_problems: int = 5, clusters: int = 3):
-    info(f"[PHASE 6.5] Starting AtCoder scrape + AI teaching transform for {max_problems} problems…")
+def pipeline(max_problems: int, clusters: int, fmt: str, folder: str = RUN_FOLDER, close_browsers: bool = True):
+    metrics = get_metrics()
+    since = metrics.snapshot()
+    info("[PHASE 6.5] Starting AtCoder scrape + AI teaching transform for %d problems…", max_problems)
 
     # Step 1: Fetch metadata
-    resp = requests.get(PROBLEMSET_URL, timeout=15)
-    resp.raise_for_status()
-    all_problems = resp.json()
-    problems = all_problems[:max_problems]
-
-    # Step 2: Scrape statements
+    with metrics.stage("metadata"):
+        with get_scheduler().slot(PROBLEMSET_URL) as slot:
+            resp = requests.get(PROBLEMSET_URL, timeout=15)
+            slot.record(resp.status_code, resp.headers)
+        record_fetch(PROBLEMSET_URL, resp.status_code, resp.elapsed.total_seconds(), len(resp.content))
+        resp.raise_for_status()
+        all_problems = resp.json()
+        problems = all_problems[:max_problems]
+
+    # Step 2: Scrape statements (paced per host by the shared scheduler)
     problem_data = []
-    for p in problems:
-        contest_id = p["contest_id"]
-        task_id = p["id"]
-        name = p["title"]
-        url = PROBLEM_PAGE.format(contest_id, task_id)
-        html = fetch_problem_html(url)
-        if html is None:
-            html = ""
-        problem_data.append({
-            "contest_id": contest_id,
-            "task_id": task_id,
-            "name": name,
-            "url": url,
-            "statement": html
-        })
-        time.sleep(1)
+    with metrics.stage("fetch_statements"):
+        for p in problems:
+            contest_id = p["contest_id"]
+            task_id = p["id"]
+            name = p["title"]
+            url = PROBLEM_PAGE.format(contest_id, task_id)
+            html = fetch_problem_html(url)
+            if html is None:
+                html = ""
+            problem_data.append({
+                "contest_id": contest_id,
+                "task_id": task_id,
+                "name": name,
+                "url": url,
+                "statement": html
+            })
+        if close_browsers:
+            close_browser_pool()
 
     # Save raw
-    folder = "phase65_runs"
     os.makedirs(folder, exist_ok=True)
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    raw_csv = os.path.join(folder, f"raw_{timestamp}.csv")
-    pd.DataFrame(problem_data).to_csv(raw_csv, index=False)
-    success(f"Saved raw problems to {raw_csv}")
+    raw_csv = os.path.join(folder, f"raw_{timestamp}{FORMATS[fmt]}")
+    write_table(problem_data, raw_csv)
+    success("Saved raw problems to %s", raw_csv)
 
     # Step 3: Cluster
-    statements_list = [p["statement"] or "empty" for p in problem_data]
-    cluster_labels = cluster_problems_with_cohere(statements_list, k=clusters)
-    for i, label in enumerate(cluster_labels):
-        problem_data[i]["cluster"] = int(label)
+    with metrics.stage("cluster"):
+        statements_list = [p["statement"] or "empty" for p in problem_data]
+        cluster_labels = cluster_problems_with_cohere(statements_list, k=clusters)
+        for i, label in enumerate(cluster_labels):
+            problem_data[i]["cluster"] = int(label)
 
-    cluster_csv = os.path.join(folder, f"clustered_{timestamp}.csv")
-    pd.DataFrame(problem_data).to_csv(cluster_csv, index=False)
-    success(f"Saved clustered problems to {cluster_csv}")
+    cluster_csv = os.path.join(folder, f"clustered_{timestamp}{FORMATS[fmt]}")
+    write_table(problem_data, cluster_csv)
+    success("Saved clustered problems to %s", cluster_csv)
 
     # Step 4: Transform each with teaching AI
-    for p in problem_data:
-        p["teaching_version"] = enhance_problem_with_ai(p["statement"])
+    with metrics.stage("teaching"):
+        for p in problem_data:
+            p["teaching_version"] = enhance_problem_with_ai(p["statement"])
 
     # Save teaching version
-    final_csv = os.path.join(folder, f"teaching_{timestamp}.csv")
+    final_csv = os.path.join(folder, f"teaching_{timestamp}{FORMATS[fmt]}")
     final_json = os.path.join(folder, f"teaching_{timestamp}.json")
-    pd.DataFrame(problem_data).to_csv(final_csv, index=False)
-    pd.DataFrame(problem_data).to_json(final_json, orient="records", indent=2)
-    success(f"[PHASE 6.5] Teaching-enhanced problems saved to {final_csv} and {final_json}")
+    write_table(problem_data, final_csv)
+    if final_json != final_csv:
+        write_table(problem_data, final_json)
+        success("[PHASE 6.5] Teaching-enhanced problems saved to %s and %s", final_csv, final_json)
+    else:
+        success("[PHASE 6.5] Teaching-enhanced problems saved to %s", final_csv)
+    metrics_json = os.path.join(folder, f"metrics_{timestamp}.json")
+    export_run(metrics_json, since)
+    success("Run metrics saved to %s", metrics_json)
     success("🚀🔥 Phase 6.5 pipeline completed successfully!")
 
 
+@app.command()
+def run_pipeline(max_problems: int = 5, clusters: int = 3,
+                 fmt: str = typer.Option("csv", "--format", help=f"Table format: {', '.join(FORMATS)}"),
+                 profile: bool = typer.Option(False, "--profile", help=f"Write cProfile/tracemalloc output to {RUN_FOLDER}")):
+    if fmt not in FORMATS:
+        error("Unknown format '%s' (expected one of: %s)", fmt, ", ".join(FORMATS))
+        raise typer.Exit(code=1)
+    with profiling(RUN_FOLDER, enabled=profile):
+        pipeline(max_problems, clusters, fmt)
+
+
 if __name__ == "__main__":
     app()
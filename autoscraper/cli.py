@@ -1,22 +1,48 @@
 import typer
 import json
-import csv
-# import os
-# import datetime
+import os
+import datetime
+from typing import List
 from autoscraper.core.scraper import scrape_with_pagination
+from autoscraper.core.frontier import crawl as crawl_sites
+from autoscraper.core.batch import load_batch, run_site_config, write_rows, run_batch as run_batch_configs
+from autoscraper.core.service import Service, make_server
+from autoscraper.core.storage import FORMATS, format_of
 from autoscraper.core.classifier import SimpleClassifier
 from autoscraper.core.eda import run_eda
-from autoscraper.utils.logger import info, success, error
+from autoscraper.utils.logger import info, success, error, configure as configure_logging, flush as flush_logs
+from autoscraper.utils.metrics import export_prometheus, profiling
 from autoscraper.core.ai_insights import run_ai_insights
 from autoscraper.core.gpt_cluster_describer import describe_clusters
 from autoscraper.core.enricher import semantic_enrich
 
 app = typer.Typer()
 
+@app.callback()
+def main(
+    ctx: typer.Context,
+    profile: bool = typer.Option(False, "--profile", help="Capture cProfile/tracemalloc output for the command"),
+    profile_dir: str = typer.Option("profiles", "--profile-dir", help="Where --profile writes its reports"),
+    log_level: str = typer.Option(None, "--log-level", help="DEBUG, INFO, SUCCESS, WARNING or ERROR (default: $AUTOSCRAPER_LOG_LEVEL or INFO)"),
+    log_file: str = typer.Option(None, "--log-file", help="Also write JSON-lines logs here (default: $AUTOSCRAPER_LOG_FILE)"),
+):
+    """Autoscraper CLI. Set AUTOSCRAPER_PROM_TEXTFILE to export run metrics for Prometheus."""
+    if log_level or log_file:
+        configure_logging(level=log_level, json_path=log_file)
+    ctx.call_on_close(export_prometheus)
+    if profile:
+        ctx.with_resource(profiling(profile_dir))
+
 @app.command()
-def fetch(url: str, selector: str):
+def fetch(
+    url: str,
+    selector: str,
+    stream: bool = typer.Option(False, "--stream", help="Parse the page while it downloads"),
+    item_limit: int = typer.Option(None, "--limit", help="Stop reading the page after this many matches (implies --stream)"),
+):
     """Fetch data directly by passing URL and single CSS selector."""
-    data = scrape_with_pagination(url, {"data": selector}, max_pages=1)
+    data = scrape_with_pagination(url, {"data": selector}, max_pages=1, stream=stream, item_limit=item_limit)
+    flush_logs()
     for item in data[:10]:
         print("→", item.get("data"))
     success(f"Scraped {len(data)} items.")
@@ -25,12 +51,18 @@ def fetch(url: str, selector: str):
 def run_config(
     config_path: str,
     csv_output: bool = typer.Option(False, "--csv", help="Export as CSV instead of JSON"),
-    max_pages: int = typer.Option(3, "--max-pages", help="Max pages to scrape"),
-    output_path: str = typer.Option(None, "--output", help="Output file path"),
+    fmt: str = typer.Option(None, "--format", help=f"Output format: {', '.join(FORMATS)} (overrides --csv)"),
+    max_pages: int = typer.Option(None, "--max-pages", help="Max pages to scrape (overrides the config's max_pages; default 3)"),
+    output_path: str = typer.Option(None, "--output", help="Output file path (format follows its extension)"),
     retries: int = typer.Option(3, "--retries", help="Number of retries for HTTP requests"),
     timeout: int = typer.Option(10, "--timeout", help="Timeout (seconds) for HTTP requests"),
 ):
     """Run scraper based on a JSON config file."""
+    fmt = fmt or ("csv" if csv_output else "json")
+    if fmt not in FORMATS:
+        error(f"Unknown format '{fmt}' (expected one of: {', '.join(FORMATS)})")
+        raise typer.Exit(code=1)
+
     info(f"Loading config from {config_path}")
     try:
         with open(config_path, "r", encoding="utf-8") as f:
@@ -39,50 +71,133 @@ def run_config(
         error(f"Failed to load config: {e}")
         raise typer.Exit(code=1)
 
-    url = config.get("url")
     selectors = config.get("selectors", {})
-    pagination_selector = config.get("pagination")
-
-    if not url or not selectors:
-        error("Config must include 'url' and 'selectors'")
+    max_pages = max_pages if max_pages is not None else config.get("max_pages", 3)
+    info(f"Scraping from {config.get('url')} with pagination up to {max_pages} pages...")
+    try:
+        # --- Phase 4: classification happens inside run_site_config ---
+        data = run_site_config(config, max_pages=max_pages, retries=retries, timeout=timeout)
+    except ValueError as e:
+        error(str(e))
         raise typer.Exit(code=1)
 
-    info(f"Scraping from {url} with pagination up to {max_pages} pages...")
-    data = scrape_with_pagination(
-        url,
-        selectors,
-        pagination_selector,
-        max_pages=max_pages,
-        retries=retries,
-        timeout=timeout,
-    )
-
-    # --- Phase 4: Classification step ---
-    classifier = SimpleClassifier()
-    for row in data:
-        row["predicted_categories"] = classifier.classify(row)
-
     # preview
+    flush_logs()
     for r in data[:5]:
         print("→", r)
     success(f"Scraped {len(data)} rows.")
 
     # set default output if not provided
     if not output_path:
-        output_path = "output.csv" if csv_output else "output.json"
-
-    if csv_output:
-        fieldnames = list(selectors.keys()) + ["predicted_categories"]
-        with open(output_path, "w", newline="", encoding="utf-8") as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            for row in data:
-                writer.writerow(row)
-        success(f"Saved CSV to {output_path}")
-    else:
+        output_path = "output" + FORMATS[fmt]
+
+    try:
+        write_rows(data, output_path, list(selectors.keys()) + ["predicted_categories"])
+    except (ValueError, RuntimeError) as e:
+        error(f"Failed to save output: {e}")
+        raise typer.Exit(code=1)
+    success(f"Saved {format_of(output_path)} to {output_path}")
+
+@app.command()
+def run_batch(
+    batch_path: str = typer.Argument(..., help="Directory of JSON configs, or a manifest JSON file"),
+    output_dir: str = typer.Option(None, "--output-dir", help="Folder for per-config outputs and run_summary.json"),
+    workers: int = typer.Option(4, "--workers", help="Configs to run concurrently"),
+    csv_output: bool = typer.Option(False, "--csv", help="Export as CSV instead of JSON"),
+    fmt: str = typer.Option(None, "--format", help=f"Output format: {', '.join(FORMATS)} (overrides --csv)"),
+    max_pages: int = typer.Option(3, "--max-pages", help="Default max pages per config"),
+    retries: int = typer.Option(3, "--retries", help="Number of retries for HTTP requests"),
+    timeout: int = typer.Option(10, "--timeout", help="Timeout (seconds) for HTTP requests"),
+):
+    """Run a directory or manifest of site configs concurrently in one process."""
+    try:
+        configs = load_batch(batch_path)
+    except Exception as e:
+        error(f"Failed to load batch: {e}")
+        raise typer.Exit(code=1)
+    if not configs:
+        error(f"No configs found in {batch_path}")
+        raise typer.Exit(code=1)
+    fmt = fmt or ("csv" if csv_output else "json")
+    if fmt not in FORMATS:
+        error(f"Unknown format '{fmt}' (expected one of: {', '.join(FORMATS)})")
+        raise typer.Exit(code=1)
+
+    if not output_dir:
+        output_dir = os.path.join("batch_runs", datetime.datetime.now().strftime("%Y%m%d_%H%M%S"))
+    summary = run_batch_configs(configs, output_dir, workers=workers, fmt=fmt,
+                                max_pages=max_pages, retries=retries, timeout=timeout)
+    if summary["failed"]:
+        raise typer.Exit(code=1)
+
+@app.command()
+def crawl(
+    config_paths: List[str] = typer.Argument(..., help="One or more JSON site configs"),
+    output_path: str = typer.Option("crawl_output.jsonl", "--output", help="JSON Lines output file"),
+    workers: int = typer.Option(8, "--workers", help="Concurrent fetch workers"),
+    retries: int = typer.Option(3, "--retries", help="Number of retries for HTTP requests"),
+    timeout: int = typer.Option(10, "--timeout", help="Timeout (seconds) for HTTP requests"),
+    expected_urls: int = typer.Option(1_000_000, "--expected-urls", help="Sizing hint for the URL seen-set"),
+):
+    """Crawl many site configs at once through a shared, deduplicated frontier."""
+    configs = []
+    for path in config_paths:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                loaded = json.load(f)
+        except Exception as e:
+            error(f"Failed to load config {path}: {e}")
+            raise typer.Exit(code=1)
+        configs.extend(loaded if isinstance(loaded, list) else [loaded])
+
+    classifier = SimpleClassifier()
+    rows_written = 0
+    try:
         with open(output_path, "w", encoding="utf-8") as out:
-            json.dump(data, out, indent=2, ensure_ascii=False)
-        success(f"Saved JSON to {output_path}")
+            for site, page_url, rows in crawl_sites(configs, workers=workers, retries=retries,
+                                                    timeout=timeout, expected_urls=expected_urls):
+                for row in rows:
+                    row["predicted_categories"] = classifier.classify(row)
+                    out.write(json.dumps({"site": site, "url": page_url, **row}, ensure_ascii=False) + "\n")
+                rows_written += len(rows)
+    except ValueError as e:
+        error(str(e))
+        raise typer.Exit(code=1)
+    success(f"Saved {rows_written} rows to {output_path}")
+
+@app.command()
+def serve(
+    host: str = typer.Option("127.0.0.1", "--host", help="Interface for the HTTP API"),
+    port: int = typer.Option(8765, "--port", help="Port for the HTTP API"),
+    socket_path: str = typer.Option(None, "--socket", help="Serve the API on this Unix socket instead of TCP"),
+    workers: int = typer.Option(2, "--workers", help="Jobs to run concurrently"),
+    queue_size: int = typer.Option(16, "--queue-size", help="Max queued jobs before the API answers 429"),
+    schedule_path: str = typer.Option(None, "--schedule", help="JSON list of {name, cron, kind, params}"),
+    output_root: str = typer.Option("service_runs", "--output-root", help="Folder for per-job outputs"),
+    warm_models: bool = typer.Option(True, "--warm-models/--no-warm-models", help="Load embedding models at startup"),
+    browsers: int = typer.Option(0, "--browsers", help="Headless browsers to keep warm for atcoder/phase6_6 jobs"),
+):
+    """Run as a long-lived service: scheduled jobs plus a local job API, with warm resources."""
+    service = Service(workers=workers, queue_size=queue_size, output_root=output_root)
+    try:
+        if schedule_path:
+            service.load_schedules(schedule_path)
+        service.warm_up(models=warm_models, browsers=browsers)
+    except Exception as e:
+        error(f"Service startup failed: {e}")
+        raise typer.Exit(code=1)
+
+    server = make_server(service, host, port, socket_path)
+    service.start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        info("Shutting down...")
+    finally:
+        server.server_close()
+        service.stop()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
 
 @app.command()
 def eda(
@@ -1,13 +1,17 @@
-import pandas as pd
+import time
 import json
 from autoscraper.utils.logger import info, success, error
+from autoscraper.core.storage import read_table, write_table
+from autoscraper.utils.metrics import record_embedding
 from sentence_transformers import SentenceTransformer
 from sklearn.cluster import KMeans
 
 # Load a lightweight embedding model once
-_model = SentenceTransformer('all-MiniLM-L6-v2')
+MODEL_NAME = 'all-MiniLM-L6-v2'
+_model = SentenceTransformer(MODEL_NAME)
 
-def run_ai_insights(input_csv: str, output_json: str = "ai_insights.json", clusters: int = 5):
+def run_ai_insights(input_csv: str, output_json: str = "ai_insights.json", clusters: int = 5,
+                    output_csv: str = "output_ai_tagged.csv"):
     """
     Generate AI-driven clustering insights from scraped data.
     - Uses sentence-transformers to embed text.
@@ -15,8 +19,8 @@ def run_ai_insights(input_csv: str, output_json: str = "ai_insights.json", clust
     - Outputs updated CSV with cluster labels and a JSON summary.
     """
     try:
-        info(f"Loading cleaned data from {input_csv}")
-        df = pd.read_csv(input_csv)
+        info("Loading cleaned data from %s", input_csv)
+        df = read_table(input_csv)
 
         # pick the column to analyze
         text_col = None
@@ -28,17 +32,20 @@ def run_ai_insights(input_csv: str, output_json: str = "ai_insights.json", clust
             raise ValueError("No suitable text column found in CSV.")
 
         texts = df[text_col].astype(str).tolist()
-        info(f"Encoding {len(texts)} items with sentence-transformers...")
+        info("Encoding %d items with sentence-transformers...", len(texts))
+        start = time.perf_counter()
         embeddings = _model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+        record_embedding(MODEL_NAME, len(texts), time.perf_counter() - start)
 
-        info(f"Clustering into {clusters} groups...")
+        if len(texts) < clusters:
+            clusters = len(texts)
+        info("Clustering into %d groups...", clusters)
         km = KMeans(n_clusters=clusters, random_state=42, n_init='auto')
         labels = km.fit_predict(embeddings)
 
         df["ai_cluster"] = labels
-        output_csv = "output_ai_tagged.csv"
-        df.to_csv(output_csv, index=False)
-        success(f"AI-tagged CSV saved to {output_csv}")
+        write_table(df, output_csv)
+        success("AI-tagged CSV saved to %s", output_csv)
 
         # cluster distribution
         cluster_counts = {}
@@ -47,12 +54,12 @@ def run_ai_insights(input_csv: str, output_json: str = "ai_insights.json", clust
 
         with open(output_json, "w", encoding="utf-8") as f:
             json.dump(cluster_counts, f, indent=2)
-        success(f"AI insights JSON saved to {output_json}")
+        success("AI insights JSON saved to %s", output_json)
 
         info("Cluster distribution:")
         for k, v in sorted(cluster_counts.items()):
-            info(f"Cluster {k}: {v} items")
+            info("Cluster %s: %d items", k, v)
 
     except Exception as e:
-        error(f"AI Insights failed: {e}")
+        error("AI Insights failed: %s", e)
         raise
@@ -0,0 +1,168 @@
+import datetime
+import glob
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from autoscraper.utils.logger import info, success, error
+from autoscraper.core.scraper import scrape_with_pagination
+from autoscraper.core.classifier import SimpleClassifier
+from autoscraper.core.storage import FORMATS, write_table
+from autoscraper.utils.metrics import get_metrics, export_run
+
+# Shared across every config in the process (stateless, safe to reuse between threads)
+_classifier = SimpleClassifier()
+
+
+# config key set by load_batch when a config file couldn't be read
+_LOAD_ERROR = "_load_error"
+
+
+def _safe_name(name: str, fallback: str) -> str:
+    """File-name-safe config name: no directories, only [A-Za-z0-9._-]."""
+    name = re.sub(r"[^A-Za-z0-9._-]+", "_", os.path.basename(str(name))).lstrip(".")
+    return name or fallback
+
+
+def load_batch(path: str) -> list:
+    """
+    Load site configs from a directory of *.json files or from a manifest.
+    A manifest is a JSON list (or {"configs": [...]}) of config paths relative
+    to the manifest, or of inline config dicts.
+    Returns a list of (name, config) pairs; names are sanitized and unique
+    so each config's output file stays inside the output directory. A config
+    file that can't be read is kept with a load error, so run_batch reports
+    it as failed instead of the whole batch aborting.
+    """
+    if os.path.isdir(path):
+        entries = sorted(glob.glob(os.path.join(path, "*.json")))
+        base_dir = path
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        entries = manifest.get("configs", []) if isinstance(manifest, dict) else manifest
+        base_dir = os.path.dirname(os.path.abspath(path))
+
+    configs = []
+    seen = set()
+    for i, entry in enumerate(entries):
+        if isinstance(entry, dict):
+            config = entry
+            name = config.get("name") or f"config_{i}"
+        else:
+            config_path = entry if os.path.isabs(entry) else os.path.join(base_dir, entry)
+            name = os.path.splitext(os.path.basename(config_path))[0]
+            try:
+                with open(config_path, "r", encoding="utf-8") as f:
+                    config = json.load(f)
+                if not isinstance(config, dict):
+                    raise ValueError("expected a JSON object")
+                name = config.get("name") or name
+            except (OSError, ValueError) as e:
+                error("Could not load config %s: %s", config_path, e, path=config_path)
+                config = {_LOAD_ERROR: f"Could not load config {entry}: {e}"}
+        name = _safe_name(name, f"config_{i}")
+        # keep per-config output files distinct
+        base, n = name, 2
+        while name in seen:
+            name = f"{base}_{n}"
+            n += 1
+        seen.add(name)
+        configs.append((name, config))
+    return configs
+
+
+def run_site_config(config: dict, max_pages: int = None, retries: int = 3, timeout: int = 10) -> list:
+    """
+    Scrape one run_config-style config and classify its rows.
+    An explicit `max_pages` wins over the config's own "max_pages" (default 3).
+    """
+    url = config.get("url")
+    selectors = config.get("selectors", {})
+    if not url or not selectors:
+        raise ValueError("Config must include 'url' and 'selectors'")
+
+    data = scrape_with_pagination(
+        url,
+        selectors,
+        config.get("pagination"),
+        max_pages=max_pages if max_pages is not None else config.get("max_pages", 3),
+        retries=retries,
+        timeout=timeout,
+        stream=config.get("stream", False),
+        item_limit=config.get("item_limit"),
+        stop_selector=config.get("stop_selector"),
+    )
+    for row in data:
+        row["predicted_categories"] = _classifier.classify(row)
+    return data
+
+
+def write_rows(data: list, output_path: str, fieldnames: list):
+    """Write scraped rows in the format implied by output_path (columns fixed to fieldnames)."""
+    write_table(data, output_path, columns=fieldnames)
+
+
+def _run_one(name, config, output_dir, fmt, max_pages, retries, timeout):
+    result = {"name": name, "url": config.get("url"), "rows": 0, "output": None,
+              "status": "ok", "error": None}
+    start = time.perf_counter()
+    try:
+        if _LOAD_ERROR in config:
+            raise ValueError(config[_LOAD_ERROR])
+        # in a batch the CLI value is only the default for configs without their own
+        data = run_site_config(config, config.get("max_pages", max_pages), retries, timeout)
+        output_path = os.path.join(output_dir, name + FORMATS[fmt])
+        fieldnames = list(config.get("selectors", {}).keys()) + ["predicted_categories"]
+        write_rows(data, output_path, fieldnames)
+        result.update(rows=len(data), output=output_path, status="ok" if data else "empty")
+        success("[%s] %d rows -> %s", name, len(data), output_path, site=name, rows=len(data))
+    except Exception as e:
+        result.update(status="failed", error=str(e))
+        error("[%s] failed: %s", name, e, site=name)
+    result["elapsed_s"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def run_batch(configs: list, output_dir: str, workers: int = 4, fmt: str = "json",
+              max_pages: int = 3, retries: int = 3, timeout: int = 10) -> dict:
+    """
+    Run many (name, config) pairs concurrently in this process.
+    Fetches share one connection pool and host scheduler; each config gets its
+    own output file and the consolidated summary goes to run_summary.json
+    (fetch/timing metrics to run_metrics.json).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    started = datetime.datetime.now()
+    start = time.perf_counter()
+    metrics = get_metrics()
+    since = metrics.snapshot()
+    info("Running %d configs with %d workers -> %s", len(configs), workers, output_dir)
+
+    with metrics.stage("batch"), ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_run_one, name, config, output_dir, fmt, max_pages, retries, timeout)
+            for name, config in configs
+        ]
+        sites = [f.result() for f in futures]
+
+    summary = {
+        "started_at": started.isoformat(timespec="seconds"),
+        "elapsed_s": round(time.perf_counter() - start, 3),
+        "workers": workers,
+        "configs": len(sites),
+        "succeeded": sum(1 for s in sites if s["status"] == "ok"),
+        "empty": sum(1 for s in sites if s["status"] == "empty"),
+        "failed": sum(1 for s in sites if s["status"] == "failed"),
+        "total_rows": sum(s["rows"] for s in sites),
+        "sites": sites,
+    }
+    summary_path = os.path.join(output_dir, "run_summary.json")
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    export_run(os.path.join(output_dir, "run_metrics.json"), since)
+    success("Batch finished in %ss: %d ok, %d empty, %d failed. Summary: %s", summary["elapsed_s"],
+            summary["succeeded"], summary["empty"], summary["failed"], summary_path)
+    return summary
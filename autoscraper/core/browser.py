@@ -0,0 +1,129 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from autoscraper.utils.logger import info, error
+from autoscraper.core.throttle import get_scheduler
+from autoscraper.utils.metrics import record_fetch
+
+_STOP = object()
+
+
+class BrowserPool:
+    """
+    Keeps headless Chromium instances warm across fetches.
+    Playwright's sync API is bound to the thread that started it, so each
+    browser lives on its own worker thread and callers hand it URLs via a queue.
+    """
+
+    def __init__(self, size: int = 1, headless: bool = True, user_agent: str = None):
+        self.size = size
+        self.headless = headless
+        self.user_agent = user_agent
+        self._jobs = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.size):
+                t = threading.Thread(target=self._worker, name=f"browser-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+            info("Browser pool started with %d browser(s)", self.size)
+
+    def _worker(self):
+        try:
+            from playwright.sync_api import sync_playwright
+
+            with sync_playwright() as p:
+                browser = p.chromium.launch(headless=self.headless)
+                try:
+                    self._serve(browser)
+                finally:
+                    browser.close()
+        except Exception as e:
+            # fail queued and future fetches instead of leaving callers blocked
+            error("Browser worker failed: %s", e)
+            self._serve(None, failure=e)
+
+    def _serve(self, browser, failure=None):
+        while True:
+            job = self._jobs.get()
+            if job is _STOP:
+                return
+            future, args = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            if failure is not None:
+                future.set_exception(failure)
+                continue
+            try:
+                future.set_result(self._render(browser, *args))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _render(self, browser, url, wait_selector, inner_selector, timeout_ms, wait_timeout_ms):
+        context = browser.new_context(user_agent=self.user_agent) if self.user_agent else browser.new_context()
+        try:
+            page = context.new_page()
+            with get_scheduler().slot(url) as slot:
+                start = time.perf_counter()
+                try:
+                    response = page.goto(url, timeout=timeout_ms)
+                except Exception:
+                    record_fetch(url, "error", time.perf_counter() - start)
+                    raise
+                status = response.status if response else 200
+                record_fetch(url, status, time.perf_counter() - start)
+                slot.record(status, response.headers if response else None)
+            if wait_selector:
+                page.wait_for_selector(wait_selector, timeout=wait_timeout_ms)
+            if inner_selector:
+                return page.inner_html(inner_selector)
+            return page.content()
+        finally:
+            context.close()
+
+    def fetch(self, url: str, wait_selector: str = None, inner_selector: str = None,
+              timeout_ms: int = 15000, wait_timeout_ms: int = 7000) -> str:
+        """Render `url` in a warm browser and return its HTML (or inner HTML of `inner_selector`)."""
+        self.start()
+        future = Future()
+        self._jobs.put((future, (url, wait_selector, inner_selector, timeout_ms, wait_timeout_ms)))
+        return future.result()
+
+    def close(self):
+        with self._lock:
+            for _ in self._threads:
+                self._jobs.put(_STOP)
+            for t in self._threads:
+                t.join(timeout=30)
+            self._threads = []
+
+
+_default_pool = None
+_default_lock = threading.Lock()
+
+
+def get_browser_pool(size: int = 1, user_agent: str = None) -> BrowserPool:
+    """Process-wide browser pool; the first caller decides its size."""
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = BrowserPool(size=size, user_agent=user_agent)
+        return _default_pool
+
+
+def close_browser_pool():
+    global _default_pool
+    with _default_lock:
+        if _default_pool is not None:
+            try:
+                _default_pool.close()
+            except Exception as e:
+                error("Closing browser pool failed: %s", e)
+            _default_pool = None
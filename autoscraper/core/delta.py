@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+
+from bs4 import BeautifulSoup
+
+from autoscraper.utils.logger import info, success, warning, error
+from autoscraper.utils.metrics import record_cache
+from autoscraper.core.scraper import fetch_response, extract_columns, combine_columns, next_page_url
+
+
+def _digest(obj) -> str:
+    data = obj if isinstance(obj, bytes) else json.dumps(obj, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha1(data).hexdigest()
+
+
+def row_key(row: dict, key_fields: list = None) -> str:
+    """Stable identity of a row: hash of its key fields (all fields when none are given)."""
+    fields = key_fields or sorted(k for k in row if k != "predicted_categories")
+    return _digest([row.get(f) for f in fields])
+
+
+def row_hash(row: dict) -> str:
+    """Content hash of a whole row, used to spot changed rows with the same key."""
+    return _digest(row)
+
+
+def resolve_key_fields(selectors: dict, key_fields: list = None) -> list:
+    """Key fields of a delta scrape, defaulting to the first selector; unknown fields raise ValueError."""
+    key_fields = list(key_fields or list(selectors)[:1])
+    unknown = [f for f in key_fields if f not in selectors]
+    if unknown:
+        raise ValueError(f"Key field(s) {', '.join(unknown)} not in selectors ({', '.join(selectors)})")
+    return key_fields
+
+
+def state_path_for(state_dir: str, base_url: str, selectors: dict, pagination_selector: str = None,
+                   key_fields: list = None) -> str:
+    """One state file per (url, selectors, pagination, key) combination."""
+    name = _digest([base_url, selectors, pagination_selector, resolve_key_fields(selectors, key_fields)])[:16]
+    return os.path.join(state_dir, f"{name}.json")
+
+
+class DeltaState:
+    """
+    What the previous run saw, persisted as JSON:
+    - pages: url -> {fingerprint, etag, last_modified, next, keys}
+    - rows:  key -> {hash, row}
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.pages = {}
+        self.rows = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.pages = data.get("pages", {})
+                self.rows = data.get("rows", {})
+            except (OSError, ValueError) as e:
+                error("Ignoring unreadable delta state %s: %s", path, e)
+
+    def save(self, pages: dict, rows: dict):
+        self.pages, self.rows = pages, rows
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"pages": pages, "rows": rows}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+def scrape_delta(base_url: str, selectors: dict, pagination_selector: str = None, max_pages: int = 5,
+                 state_path: str = None, key_fields: list = None, retries=3, backoff=1, timeout=10,
+                 scheduler=None, save: bool = True) -> dict:
+    """
+    Incremental scrape_with_pagination.
+    Pages are fetched conditionally (ETag / Last-Modified); a 304 or an unchanged
+    body fingerprint reuses the stored rows and next link without re-parsing.
+    Rows are identified by `key_fields` (default: the first selector), so a row
+    whose key is unchanged but whose other fields differ is reported as changed.
+    Rows sharing a key are kept apart by their order of occurrence.
+    Returns {"added", "changed", "removed", "rows", "unchanged", "pages_fetched",
+    "pages_skipped", "duplicate_keys", "state"}. The new state is saved unless
+    `save` is False; callers that must finish downstream work first save
+    `result["state"]` themselves with DeltaState(state_path).save(**result["state"]).
+    """
+    key_fields = resolve_key_fields(selectors, key_fields)
+    state = DeltaState(state_path)
+    pages = {}
+    current = {}
+    order = []
+    seen = set()
+    page_url = base_url
+    pages_fetched = pages_skipped = duplicates = 0
+    complete = True
+
+    while page_url and pages_fetched + pages_skipped < max_pages and page_url not in pages:
+        info("Scraping page %d: %s", pages_fetched + pages_skipped + 1, page_url, url=page_url)
+        previous = state.pages.get(page_url)
+        headers = {}
+        if previous and previous.get("etag"):
+            headers["If-None-Match"] = previous["etag"]
+        if previous and previous.get("last_modified"):
+            headers["If-Modified-Since"] = previous["last_modified"]
+
+        response = fetch_response(page_url, retries, backoff, timeout, scheduler, headers=headers or None)
+        if response is None:
+            error("Skipping page due to fetch failure: %s", page_url, url=page_url)
+            complete = False
+            break
+
+        fingerprint = _digest(response.content) if response.status_code != 304 else None
+        # a stored key already taken this run would collide, so such a page is re-parsed
+        reusable = previous is not None and all(k in state.rows and k not in current
+                                                for k in previous.get("keys", []))
+        unchanged = reusable and (response.status_code == 304 or fingerprint == previous.get("fingerprint"))
+        record_cache("delta_page", unchanged)
+        if unchanged:
+            info("Page unchanged, reusing %d stored rows: %s", len(previous["keys"]), page_url, url=page_url)
+            page = dict(previous)
+            for key in page["keys"]:
+                current[key] = state.rows[key]
+            pages_skipped += 1
+        else:
+            soup = BeautifulSoup(response.text, "lxml")
+            keys = []
+            for row in combine_columns(extract_columns(soup, selectors, pages_fetched + pages_skipped + 1)):
+                key = base = row_key(row, key_fields)
+                occurrence = 0
+                while key in current:
+                    occurrence += 1
+                    key = _digest([base, occurrence])
+                duplicates += occurrence > 0
+                current[key] = {"hash": row_hash(row), "row": row}
+                keys.append(key)
+            page = {
+                "fingerprint": fingerprint,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "next": next_page_url(soup, page_url, pagination_selector),
+                "keys": keys,
+            }
+            pages_fetched += 1
+        pages[page_url] = page
+        for key in page["keys"]:
+            if key not in seen:
+                seen.add(key)
+                order.append(key)
+        page_url = page["next"]
+
+    added, changed = [], []
+    for key in order:
+        entry = current[key]
+        old = state.rows.get(key)
+        if old is None:
+            added.append(entry["row"])
+        elif old["hash"] != entry["hash"]:
+            changed.append(entry["row"])
+    if complete:
+        removed = [entry["row"] for key, entry in state.rows.items() if key not in current]
+        new_state = {"pages": pages, "rows": current}
+    else:
+        # a partial crawl says nothing about rows on pages we never reached
+        removed = []
+        new_state = {"pages": {**state.pages, **pages}, "rows": {**state.rows, **current}}
+    if save:
+        state.save(**new_state)
+    if duplicates:
+        warning("%d row(s) share a key on %s (key fields: %s); kept apart by occurrence order",
+                duplicates, base_url, ", ".join(key_fields), url=base_url)
+    success("Delta: %d added, %d changed, %d removed (%d of %d pages unchanged)",
+            len(added), len(changed), len(removed), pages_skipped, pages_fetched + pages_skipped)
+    return {
+        "added": added,
+        "changed": changed,
+        "removed": removed,
+        "rows": [current[k]["row"] for k in order],
+        "unchanged": len(order) - len(added) - len(changed),
+        "pages_fetched": pages_fetched,
+        "pages_skipped": pages_skipped,
+        "duplicate_keys": duplicates,
+        "state": new_state,
+    }
@@ -1,22 +1,23 @@
 import pandas as pd
 import json
 from autoscraper.utils.logger import info, success, error
+from autoscraper.core.storage import read_table, write_table
 
 def run_eda(input_csv: str, cleaned_csv: str = "output_cleaned.csv", summary_json: str = "insights.json"):
     """
-    Run basic EDA & cleaning on the scraped CSV:
+    Run basic EDA & cleaning on the scraped table (CSV, JSON Lines or Parquet):
     - Remove duplicates
     - Handle missing values
     - Group by predicted_categories
     - Save cleaned CSV & JSON summary
     """
     try:
-        info(f"Loading scraped data from {input_csv}")
-        df = pd.read_csv(input_csv)
+        info("Loading scraped data from %s", input_csv)
+        df = read_table(input_csv)
 
         info("Initial rows: " + str(len(df)))
-        # Drop duplicates
-        df.drop_duplicates(inplace=True)
+        # Drop duplicates (compared as text, since list columns are unhashable)
+        df = df[~df.astype(str).duplicated()]
 
         # Fill missing values (simple approach)
         df.fillna("", inplace=True)
@@ -25,8 +26,8 @@ def run_eda(input_csv: str, cleaned_csv: str = "output_cleaned.csv", summary_jso
         if "predicted_categories" in df.columns:
             # Convert stringified lists to Python lists (if needed)
             def parse_tags(val):
-                if pd.isna(val): return []
                 if isinstance(val, list): return val
+                if pd.isna(val) or val == "": return []
                 try:
                     # Try to evaluate as JSON or Python list-like
                     parsed = json.loads(val)
@@ -40,9 +41,9 @@ def run_eda(input_csv: str, cleaned_csv: str = "output_cleaned.csv", summary_jso
         else:
             df["predicted_categories"] = [[] for _ in range(len(df))]
 
-        # Save cleaned CSV
-        df.to_csv(cleaned_csv, index=False)
-        success(f"Cleaned data saved to {cleaned_csv}")
+        # Save cleaned table (format follows the file extension)
+        write_table(df, cleaned_csv)
+        success("Cleaned data saved to %s", cleaned_csv)
 
         # Generate summary: count of each category
         category_counts = {}
@@ -53,12 +54,12 @@ def run_eda(input_csv: str, cleaned_csv: str = "output_cleaned.csv", summary_jso
         # Save JSON summary
         with open(summary_json, "w", encoding="utf-8") as f:
             json.dump(category_counts, f, indent=2, ensure_ascii=False)
-        success(f"Insights saved to {summary_json}")
+        success("Insights saved to %s", summary_json)
 
         info("Top categories:")
         for cat, count in sorted(category_counts.items(), key=lambda x: x[1], reverse=True):
-            info(f"{cat}: {count}")
+            info("%s: %s", cat, count)
 
     except Exception as e:
-        error(f"EDA failed: {e}")
+        error("EDA failed: %s", e)
         raise
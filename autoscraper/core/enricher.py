@@ -1,11 +1,14 @@
-import pandas as pd
+import time
 from autoscraper.utils.logger import info, success, error
+from autoscraper.core.storage import read_table, write_table
+from autoscraper.utils.metrics import record_embedding
 from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 
 # Load model once
-_model = SentenceTransformer('all-MiniLM-L6-v2')
+MODEL_NAME = 'all-MiniLM-L6-v2'
+_model = SentenceTransformer(MODEL_NAME)
 
 def semantic_enrich(input_csv: str, output_csv: str = "output_enriched.csv", sim_threshold: float = 0.90):
     """
@@ -14,8 +17,8 @@ def semantic_enrich(input_csv: str, output_csv: str = "output_enriched.csv", sim
     - Merges semantically similar rows
     """
     try:
-        info(f"Loading data from {input_csv}...")
-        df = pd.read_csv(input_csv)
+        info("Loading data from %s...", input_csv)
+        df = read_table(input_csv)
 
         # Pick main text column
         text_col = None
@@ -27,8 +30,10 @@ def semantic_enrich(input_csv: str, output_csv: str = "output_enriched.csv", sim
             raise ValueError("No suitable text column (quote/data/title) found.")
 
         texts = df[text_col].astype(str).tolist()
-        info(f"Encoding {len(texts)} items for semantic comparison...")
+        info("Encoding %d items for semantic comparison...", len(texts))
+        start = time.perf_counter()
         embeddings = _model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+        record_embedding(MODEL_NAME, len(texts), time.perf_counter() - start)
 
         # Semantic deduplication
         keep_indices = []
@@ -44,9 +49,9 @@ def semantic_enrich(input_csv: str, output_csv: str = "output_enriched.csv", sim
                     seen[j] = True
 
         enriched_df = df.iloc[keep_indices].reset_index(drop=True)
-        enriched_df.to_csv(output_csv, index=False)
-        success(f"Enriched CSV saved to {output_csv} (from {len(df)} → {len(enriched_df)} rows)")
+        write_table(enriched_df, output_csv)
+        success("Enriched CSV saved to %s (from %d → %d rows)", output_csv, len(df), len(enriched_df))
 
     except Exception as e:
-        error(f"Semantic enrichment failed: {e}")
+        error("Semantic enrichment failed: %s", e)
         raise
@@ -0,0 +1,229 @@
+import hashlib
+import heapq
+import itertools
+import math
+import re
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+from bs4 import BeautifulSoup
+
+from autoscraper.utils.logger import info, success, error
+from autoscraper.core.scraper import fetch_page, extract_columns, combine_columns, next_page_url
+from autoscraper.core.throttle import get_scheduler
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form used for dedup: lowercase scheme/host, no fragment, no default port."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if (scheme == "http" and netloc.endswith(":80")) or (scheme == "https" and netloc.endswith(":443")):
+        netloc = netloc.rsplit(":", 1)[0]
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings.
+    ~1.8 MB holds a million URLs at a 0.1% false-positive rate.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def add(self, item: str) -> bool:
+        """Add `item`; returns False if it was (probably) already present."""
+        new = False
+        for p in self._positions(item):
+            mask = 1 << (p & 7)
+            if not self.bits[p >> 3] & mask:
+                self.bits[p >> 3] |= mask
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+
+class Site:
+    """
+    A site config in the run_config format, plus optional crawl rules:
+    name, max_pages, max_depth, follow (CSS selector for links),
+    link_patterns / deny_patterns (regexes on absolute URLs), same_domain, priority.
+    """
+
+    def __init__(self, config: dict, index: int = 0):
+        self.index = index
+        self.url = config.get("url")
+        self.selectors = config.get("selectors", {})
+        self.pagination = config.get("pagination")
+        self.name = config.get("name") or urlsplit(self.url or "").netloc
+        self.max_pages = config.get("max_pages", 100)
+        self.max_depth = config.get("max_depth", 0)
+        self.follow = config.get("follow", "a[href]")
+        self.link_patterns = [re.compile(p) for p in config.get("link_patterns", [])]
+        self.deny_patterns = [re.compile(p) for p in config.get("deny_patterns", [])]
+        self.same_domain = config.get("same_domain", True)
+        self.priority = config.get("priority", 0)
+        if not self.url or not self.selectors:
+            raise ValueError(f"Site config '{self.name}' must include 'url' and 'selectors'")
+        self.host = urlsplit(self.url).netloc.lower()
+        self.queued = 0
+
+    def allows(self, url: str) -> bool:
+        if self.same_domain and urlsplit(url).netloc.lower() != self.host:
+            return False
+        if self.link_patterns and not any(p.search(url) for p in self.link_patterns):
+            return False
+        return not any(p.search(url) for p in self.deny_patterns)
+
+
+class CrawlFrontier:
+    """Per-domain priority queues served round-robin, deduplicated through a Bloom filter."""
+
+    def __init__(self, expected_urls: int = 1_000_000, error_rate: float = 0.001):
+        self.seen = BloomFilter(expected_urls, error_rate)
+        self._queues = {}
+        self._hosts = deque()
+        self._seq = itertools.count()
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, url: str, site: int = 0, depth: int = 0, priority: int = 0) -> bool:
+        """Queue `url` unless it has been seen before. Lower priority is served first."""
+        url = normalize_url(url)
+        if not self.seen.add(url):
+            return False
+        host = urlsplit(url).netloc
+        queue = self._queues.get(host)
+        if queue is None:
+            queue = self._queues[host] = []
+            self._hosts.append(host)
+        heapq.heappush(queue, (priority, next(self._seq), url, site, depth))
+        self._size += 1
+        return True
+
+    def pop(self, ready=None):
+        """
+        Next (url, site, depth) from the first host (round-robin) for which
+        `ready(host)` is true, or None if no host is ready.
+        """
+        for _ in range(len(self._hosts)):
+            host = self._hosts[0]
+            self._hosts.rotate(-1)
+            if ready is not None and not ready(host):
+                continue
+            queue = self._queues[host]
+            _, _, url, site, depth = heapq.heappop(queue)
+            if not queue:
+                del self._queues[host]
+                self._hosts.remove(host)
+            self._size -= 1
+            return url, site, depth
+        return None
+
+
+def _fetch_and_extract(site: Site, url: str, depth: int, retries, backoff, timeout, scheduler):
+    html = fetch_page(url, retries, backoff, timeout, scheduler)
+    if not html:
+        return None, []
+    soup = BeautifulSoup(html, "lxml")
+    rows = combine_columns(extract_columns(soup, site.selectors))
+
+    links = []
+    nxt = next_page_url(soup, url, site.pagination)
+    if nxt:
+        links.append((nxt, depth))
+    if depth < site.max_depth and site.follow:
+        for a in soup.select(site.follow):
+            href = a.get("href")
+            if not href:
+                continue
+            link = urljoin(url, href)
+            if link.startswith(("http://", "https://")) and site.allows(link):
+                links.append((link, depth + 1))
+    return rows, links
+
+
+def crawl(configs: list, workers: int = 8, retries=3, backoff=1, timeout=10, scheduler=None,
+          expected_urls: int = 1_000_000):
+    """
+    Crawl many site configs at once.
+    Yields (site_name, url, rows) per fetched page as results arrive; per-site
+    page budgets and depth rules bound the crawl, the host scheduler paces it.
+    """
+    scheduler = scheduler or get_scheduler()
+    sites = [Site(cfg, i) for i, cfg in enumerate(configs)]
+    frontier = CrawlFrontier(expected_urls)
+
+    def enqueue(site, url, depth):
+        if site.queued >= site.max_pages:
+            return
+        if frontier.add(url, site.index, depth, site.priority + depth):
+            site.queued += 1
+
+    for site in sites:
+        enqueue(site, site.url, 0)
+
+    inflight = {}
+    per_host = Counter()
+    fetched = 0
+    start = time.time()
+    info("Crawling %d site(s) with %d workers...", len(sites), workers)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while frontier or inflight:
+            while len(inflight) < workers:
+                entry = frontier.pop(ready=lambda host: per_host[host] < scheduler.limit(host))
+                if entry is None:
+                    break
+                url, site_idx, depth = entry
+                host = urlsplit(url).netloc
+                per_host[host] += 1
+                future = pool.submit(_fetch_and_extract, sites[site_idx], url, depth,
+                                     retries, backoff, timeout, scheduler)
+                inflight[future] = (url, site_idx, host)
+
+            if not inflight:
+                # every queued host is backing off
+                time.sleep(0.05)
+                continue
+
+            done, _ = wait(inflight, timeout=0.5, return_when=FIRST_COMPLETED)
+            for future in done:
+                url, site_idx, host = inflight.pop(future)
+                per_host[host] -= 1
+                site = sites[site_idx]
+                try:
+                    rows, links = future.result()
+                except Exception as e:
+                    error("Crawl of %s failed: %s", url, e, url=url)
+                    continue
+                if rows is None:
+                    continue
+                fetched += 1
+                for link, depth in links:
+                    enqueue(site, link, depth)
+                yield site.name, url, rows
+
+    success("Crawl finished: %d pages in %.1fs (%d unique URLs seen)",
+            fetched, time.time() - start, frontier.seen.count)
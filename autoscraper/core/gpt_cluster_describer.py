@@ -1,25 +1,16 @@
-import pandas as pd
 import json
 from autoscraper.utils.logger import info, success, error
+from autoscraper.core.storage import read_table
+from autoscraper.utils.metrics import llm_call
+from autoscraper.utils.cohere_client import get_cohere_client
 from collections import defaultdict
-from dotenv import load_dotenv
-import os
-import cohere  # ✅ switched from openai to cohere
-
-# Load .env from the project root
-load_dotenv()
-
-# Set the Cohere key
-COHERE_API_KEY = os.getenv("COHERE_API_KEY")
-if not COHERE_API_KEY:
-    raise RuntimeError("COHERE_API_KEY not found in environment variables!")
 
 # Initialize Cohere client
-co = cohere.Client(COHERE_API_KEY)
+co = get_cohere_client()
 
 def describe_clusters(input_csv: str, output_json: str = "cluster_descriptions.json", top_n: int = 5, model: str = "command-xlarge"):
     try:
-        df = pd.read_csv(input_csv)
+        df = read_table(input_csv)
         if "ai_cluster" not in df.columns:
             raise ValueError("Missing 'ai_cluster' column in input CSV.")
 
@@ -47,23 +38,24 @@ def describe_clusters(input_csv: str, output_json: str = "cluster_descriptions.j
             )
             prompt += "\n".join([f"{i+1}. {t}" for i, t in enumerate(examples)])
 
-            info(f"Sending cluster {cluster_id} (top {len(examples)}) to Cohere...")
+            info("Sending cluster %s (top %d) to Cohere...", cluster_id, len(examples))
 
             # Call Cohere
-            response = co.generate(
+            response = llm_call(
+                co.generate, "generate",
                 model=model,
                 prompt=prompt,
                 temperature=0.5
             )
             summary = response.generations[0].text.strip()
             summaries[str(cluster_id)] = summary
-            info(f"Cluster {cluster_id} summary: {summary}")
+            info("Cluster %s summary: %s", cluster_id, summary)
 
         # Save JSON
         with open(output_json, "w", encoding="utf-8") as f:
             json.dump(summaries, f, indent=2, ensure_ascii=False)
-        success(f"Cluster descriptions saved to {output_json}")
+        success("Cluster descriptions saved to %s", output_json)
 
     except Exception as e:
-        error(f"Cohere cluster description failed: {e}")
+        error("Cohere cluster description failed: %s", e)
         raise
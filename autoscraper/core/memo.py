@@ -0,0 +1,179 @@
+import datetime
+import hashlib
+import inspect
+import json
+import os
+
+from autoscraper.utils.logger import info, success
+from autoscraper.utils.metrics import get_metrics, record_cache
+
+MAX_ENTRIES_PER_STAGE = 20
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def code_digest(funcs) -> str:
+    """Hash of the source modules implementing a stage, so code edits invalidate it."""
+    h = hashlib.sha1()
+    for fn in funcs:
+        try:
+            h.update(inspect.getsource(inspect.getmodule(fn)).encode("utf-8"))
+        except (OSError, TypeError):
+            h.update(getattr(fn, "__qualname__", repr(fn)).encode("utf-8"))
+    return h.hexdigest()
+
+
+def check_rerun_from(stages: list, rerun_from: str):
+    """Raise ValueError when `rerun_from` is set but names none of `stages`."""
+    names = [stage.name for stage in stages]
+    if rerun_from is not None and rerun_from not in names:
+        raise ValueError(f"Unknown stage '{rerun_from}' (expected one of: {', '.join(names)})")
+
+
+class Stage:
+    """
+    One memoizable pipeline step.
+    - inputs: names of upstream artifacts it reads
+    - params: everything else that affects its output (options, model names)
+    - outputs: artifact name -> path it writes
+    - run: callable producing the outputs
+    - code: functions whose module source is part of the fingerprint
+    - volatile: always rerun (e.g. a live scrape)
+    - max_age: seconds a cached result stays reusable (None: until its fingerprint changes)
+    """
+
+    def __init__(self, name, inputs, params, outputs, run, code=(), volatile=False, max_age=None):
+        self.name = name
+        self.inputs = inputs
+        self.params = params
+        self.outputs = outputs
+        self.run = run
+        self.code = code
+        self.volatile = volatile
+        self.max_age = max_age
+
+
+class StageCache:
+    """
+    Make-style memoization of pipeline stages.
+    Fingerprints (input artifact hashes + params + code) and the outputs they
+    produced are recorded in a JSON manifest; a stage whose fingerprint is
+    already recorded, with its outputs still on disk, is not rerun.
+    """
+
+    def __init__(self, manifest_path: str):
+        self.manifest_path = manifest_path
+        self.manifest = {"stages": {}}
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+        tmp = f"{self.manifest_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.manifest_path)
+
+    def fingerprint(self, stage: Stage, artifacts: dict) -> str:
+        payload = {
+            "inputs": {name: file_digest(artifacts[name]) for name in stage.inputs},
+            "params": stage.params,
+            "code": code_digest(stage.code),
+        }
+        return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _expired(stage: Stage, entry: dict) -> bool:
+        if stage.max_age is None:
+            return False
+        age = datetime.datetime.now() - datetime.datetime.fromisoformat(entry["created_at"])
+        return age.total_seconds() > stage.max_age
+
+    def lookup(self, stage: Stage, fingerprint: str):
+        entry = self.manifest["stages"].get(stage.name, {}).get(fingerprint)
+        if entry and not self._expired(stage, entry) and all(os.path.exists(p) for p in entry["outputs"].values()):
+            return entry["outputs"]
+        return None
+
+    def record(self, stage: Stage, fingerprint: str, outputs: dict):
+        entries = self.manifest["stages"].setdefault(stage.name, {})
+        entries.pop(fingerprint, None)
+        entries[fingerprint] = {
+            "params": stage.params,
+            "outputs": outputs,
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+        while len(entries) > MAX_ENTRIES_PER_STAGE:
+            entries.pop(next(iter(entries)))
+        self._save()
+
+    def _why(self, stage: Stage, fingerprint: str) -> str:
+        entries = self.manifest["stages"].get(stage.name)
+        if not entries:
+            return "never run"
+        entry = entries.get(fingerprint)
+        if entry and self._expired(stage, entry):
+            return f"cached result older than {stage.max_age}s"
+        last = list(entries.values())[-1]["params"]
+        changed = [f"{k}: {last.get(k)!r} -> {v!r}" for k, v in stage.params.items() if last.get(k) != v]
+        return "params changed (" + ", ".join(changed) + ")" if changed else "inputs or code changed"
+
+    def run(self, stages: list, rerun_from: str = None, artifacts: dict = None) -> dict:
+        """
+        Run stages in order, reusing cached outputs up to the first changed stage.
+        `artifacts` (name -> path) is updated in place as stages run or hit.
+        """
+        check_rerun_from(stages, rerun_from)
+        artifacts = artifacts if artifacts is not None else {}
+        forced = False
+        for stage in stages:
+            forced = forced or stage.name == rerun_from
+            fp = self.fingerprint(stage, artifacts)
+            cached = None if (forced or stage.volatile) else self.lookup(stage, fp)
+            record_cache("stage", cached is not None)
+            if cached is not None:
+                info("[cache hit] %s: reusing %s", stage.name, ", ".join(cached.values()), stage=stage.name)
+                artifacts.update(cached)
+                continue
+            info("[cache miss] %s: running", stage.name, stage=stage.name)
+            with get_metrics().stage(stage.name):
+                stage.run()
+            outputs = dict(stage.outputs)
+            artifacts.update(outputs)
+            if not stage.volatile:
+                self.record(stage, fp, outputs)
+        return artifacts
+
+    def explain(self, stages: list, rerun_from: str = None, artifacts: dict = None) -> list:
+        """Dry run: report which stages would be reused and why the others would run."""
+        check_rerun_from(stages, rerun_from)
+        artifacts = dict(artifacts or {})
+        report = []
+        stale = False
+        for stage in stages:
+            stale = stale or stage.name == rerun_from
+            if stage.volatile:
+                status, reason = "run", "volatile stage"
+            elif stale:
+                status, reason = "run", "upstream stage reruns" if stage.name != rerun_from else "forced"
+            else:
+                fp = self.fingerprint(stage, artifacts)
+                cached = self.lookup(stage, fp)
+                if cached is not None:
+                    status, reason = "hit", ", ".join(cached.values())
+                    artifacts.update(cached)
+                else:
+                    status, reason = "run", self._why(stage, fp)
+            stale = stale or status == "run"
+            report.append({"stage": stage.name, "status": status, "reason": reason})
+            info("%-10s %-6s %s", stage.name, "CACHED" if status == "hit" else "RUN", reason)
+        hits = sum(1 for r in report if r["status"] == "hit")
+        success("%d/%d stages would be reused", hits, len(report))
+        return report
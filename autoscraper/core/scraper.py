@@ -1,81 +1,165 @@
 import requests
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlparse
 import time
-from autoscraper.utils.logger import info, error
-
-def fetch_page(url, retries=3, backoff=1, timeout=10):
-    """Fetch a page with retries and exponential backoff."""
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                      "(KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Referer": "https://google.com/",
-        "Connection": "keep-alive",
-    }
+import threading
+from requests.adapters import HTTPAdapter
+from autoscraper.utils.logger import debug, info, error
+from autoscraper.core.throttle import get_scheduler, THROTTLE_STATUSES
+from autoscraper.utils.metrics import get_metrics, record_fetch
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Referer": "https://google.com/",
+    "Connection": "keep-alive",
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session(pool_size: int = 32):
+    """Process-wide requests.Session so every fetch reuses pooled keep-alive connections."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(DEFAULT_HEADERS)
+            _session = session
+        return _session
+
+def fetch_response(url, retries=3, backoff=1, timeout=10, scheduler=None, headers=None):
+    """
+    Fetch a page with retries, paced by the per-host scheduler, returning the
+    requests.Response (a 304 counts as success) or None.
+    429/503 responses are handed to the scheduler (Retry-After, AIMD back-off);
+    other failures retry with exponential backoff.
+    """
+    scheduler = scheduler or get_scheduler()
+    session = get_session()
     for attempt in range(1, retries + 1):
         try:
-            info(f"Fetching {url} (attempt {attempt})")
-            response = requests.get(url, headers=headers, timeout=timeout)
+            debug("Fetching %s (attempt %d)", url, attempt, url=url, attempt=attempt)
+            with scheduler.slot(url) as slot:
+                start = time.perf_counter()
+                try:
+                    response = session.get(url, timeout=timeout, headers=headers)
+                except requests.RequestException:
+                    record_fetch(url, "error", time.perf_counter() - start)
+                    raise
+                record_fetch(url, response.status_code, time.perf_counter() - start, len(response.content))
+                slot.record(response.status_code, response.headers)
             response.raise_for_status()
-            return response.text
+            return response
         except requests.RequestException as e:
-            error(f"Error fetching {url}: {e}")
+            error("Error fetching %s: %s", url, e, url=url, attempt=attempt)
             if attempt == retries:
-                error(f"Max retries reached for {url}. Skipping.")
+                error("Max retries reached for %s. Skipping.", url, url=url)
                 return None
+            get_metrics().inc("fetch_retries_total", host=urlparse(url).netloc)
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            if status in THROTTLE_STATUSES:
+                # the scheduler holds this host until Retry-After / its back-off expires
+                continue
             wait = backoff * (2 ** (attempt - 1))
-            info(f"Retrying in {wait} seconds...")
+            info("Retrying in %s seconds...", wait)
             time.sleep(wait)
 
+def fetch_page(url, retries=3, backoff=1, timeout=10, scheduler=None):
+    """Fetch a page's HTML with retries (see fetch_response), or None on failure."""
+    response = fetch_response(url, retries, backoff, timeout, scheduler)
+    return response.text if response is not None else None
+
 
 
-def scrape(url: str, selector: str, retries=3, backoff=1, timeout=10):
+def scrape(url: str, selector: str, retries=3, backoff=1, timeout=10, scheduler=None):
     """Scrape elements matching selector from a single page with retry."""
-    html = fetch_page(url, retries, backoff, timeout)
+    html = fetch_page(url, retries, backoff, timeout, scheduler)
     if not html:
         return []
     soup = BeautifulSoup(html, 'lxml')
     elements = soup.select(selector)
     return [el.get_text(strip=True) for el in elements]
 
+def extract_columns(soup, selectors: dict, page_label=None) -> dict:
+    """Apply each CSS selector to a parsed page, returning {key: [texts]}."""
+    columns = {}
+    for key, sel in selectors.items():
+        elements = soup.select(sel)
+        if page_label is not None:
+            debug("Found %d elements for selector '%s' on page %s", len(elements), sel, page_label)
+        columns[key] = [el.get_text(strip=True) for el in elements]
+    return columns
+
+def combine_columns(columns: dict) -> list:
+    """Zip per-selector columns into row dicts, padding short columns with None."""
+    items_count = max(len(v) for v in columns.values()) if columns else 0
+    combined = []
+    for i in range(items_count):
+        row = {k: (v[i] if i < len(v) else None) for k, v in columns.items()}
+        combined.append(row)
+    return combined
+
+def next_page_url(soup, page_url: str, pagination_selector: str = None):
+    """Resolve the absolute URL of the "next" link, or None."""
+    if not pagination_selector:
+        return None
+    next_link = soup.select_one(pagination_selector)
+    if next_link and next_link.get('href'):
+        return urljoin(page_url, next_link['href'])
+    return None
+
 def scrape_with_pagination(base_url: str, selectors: dict, pagination_selector: str = None,
-                           max_pages: int = 5, retries=3, backoff=1, timeout=10):
+                           max_pages: int = 5, retries=3, backoff=1, timeout=10, scheduler=None,
+                           stream: bool = False, item_limit: int = None, stop_selector: str = None):
+    """
+    Scrape up to `max_pages` pages following `pagination_selector`.
+    With `stream` (implied by `item_limit` / `stop_selector`) each page is parsed
+    while it downloads and reading stops early once `item_limit` items per
+    selector or the `stop_selector` element have been seen (see core.streaming).
+    """
+    stream = stream or bool(item_limit) or bool(stop_selector)
+    if stream:
+        # core.streaming imports this module for the shared session
+        from autoscraper.core.streaming import stream_page
     all_data = {k: [] for k in selectors.keys()}
     page_url = base_url
     pages_scraped = 0
 
     while page_url and pages_scraped < max_pages:
-        info(f"Scraping page {pages_scraped + 1}: {page_url}")
-        html = fetch_page(page_url, retries, backoff, timeout)
-        if not html:
-            error(f"Skipping page due to fetch failure: {page_url}")
-            break
-
-        soup = BeautifulSoup(html, 'lxml')
+        info("Scraping page %d: %s", pages_scraped + 1, page_url, url=page_url)
+        if stream:
+            page = stream_page(page_url, selectors, pagination_selector, item_limit, stop_selector,
+                               retries, backoff, timeout, scheduler)
+            if page is None:
+                error("Skipping page due to fetch failure: %s", page_url, url=page_url)
+                break
+            columns, next_url = page["columns"], page["next"]
+            for key, values in columns.items():
+                debug("Found %d elements for selector '%s' on page %s", len(values), selectors[key], pages_scraped + 1)
+            if page["stopped_early"]:
+                debug("Stopped reading %s early after %d bytes", page_url, page["bytes"], url=page_url)
+        else:
+            html = fetch_page(page_url, retries, backoff, timeout, scheduler)
+            if not html:
+                error("Skipping page due to fetch failure: %s", page_url, url=page_url)
+                break
+            soup = BeautifulSoup(html, 'lxml')
+            columns = extract_columns(soup, selectors, pages_scraped + 1)
+            next_url = next_page_url(soup, page_url, pagination_selector)
 
-        for key, sel in selectors.items():
-            elements = soup.select(sel)
-            info(f"Found {len(elements)} elements for selector '{sel}' on page {pages_scraped + 1}")
-            all_data[key].extend([el.get_text(strip=True) for el in elements])
+        for key, values in columns.items():
+            all_data[key].extend(values)
 
         pages_scraped += 1
 
-        if pagination_selector:
-            next_link = soup.select_one(pagination_selector)
-            if next_link and next_link.get('href'):
-                page_url = urljoin(page_url, next_link['href'])
-                info(f"Next page URL resolved to: {page_url}")
-            else:
-                page_url = None
-        else:
-            page_url = None
-
-    items_count = max(len(v) for v in all_data.values()) if all_data else 0
-    combined = []
-    for i in range(items_count):
-        row = {k: (v[i] if i < len(v) else None) for k, v in all_data.items()}
-        combined.append(row)
+        page_url = next_url
+        if page_url:
+            debug("Next page URL resolved to: %s", page_url)
 
-    return combined
+    return combine_columns(all_data)
@@ -0,0 +1,403 @@
+import datetime
+import hashlib
+import itertools
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from autoscraper.utils.logger import debug, info, success, warning, error
+from autoscraper.core.batch import _safe_name, load_batch, run_batch, run_site_config, write_rows
+from autoscraper.core.scraper import get_session
+from autoscraper.core.throttle import get_scheduler
+from autoscraper.core.storage import FORMATS
+from autoscraper.utils.metrics import get_metrics, export_run
+
+_CRON_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+}
+# day-of-week accepts 0-7 (both 0 and 7 are Sunday)
+_CRON_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+
+class CronSchedule:
+    """Minimal 5-field cron expression: minute hour day-of-month month day-of-week."""
+
+    def __init__(self, expr: str):
+        self.expr = expr
+        fields = _CRON_ALIASES.get(expr.strip(), expr).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression must have 5 fields: '{expr}'")
+        self.fields = [self._parse(f, lo, hi) for f, (lo, hi) in zip(fields, _CRON_RANGES)]
+        self.fields[4] = {v % 7 for v in self.fields[4]}
+        self.dom_restricted = fields[2] != "*"
+        self.dow_restricted = fields[4] != "*"
+
+    @staticmethod
+    def _parse(field, lo, hi):
+        values = set()
+        for part in field.split(","):
+            step = 1
+            if "/" in part:
+                part, step_s = part.split("/", 1)
+                step = int(step_s)
+            if part == "*":
+                start, end = lo, hi
+            elif "-" in part:
+                start, end = (int(x) for x in part.split("-", 1))
+            else:
+                start = end = int(part)
+                if step != 1:
+                    end = hi
+            if start < lo or end > hi or start > end or step < 1:
+                raise ValueError(f"Invalid cron field '{field}'")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def matches(self, dt: datetime.datetime) -> bool:
+        minute, hour, dom, month, dow = self.fields
+        if dt.minute not in minute or dt.hour not in hour or dt.month not in month:
+            return False
+        dom_ok = dt.day in dom
+        dow_ok = (dt.weekday() + 1) % 7 in dow
+        if self.dom_restricted and self.dow_restricted:
+            return dom_ok or dow_ok
+        return dom_ok and dow_ok
+
+
+def _job_format(params):
+    return params.get("format") or ("csv" if params.get("csv") else "json")
+
+
+def _job_config(params, output_dir):
+    config = params.get("config")
+    if config is None:
+        with open(params["config_path"], "r", encoding="utf-8") as f:
+            config = json.load(f)
+    data = run_site_config(config, params.get("max_pages"), params.get("retries", 3), params.get("timeout", 10))
+    name = _safe_name(config.get("name", "output"), "output")
+    output_path = os.path.join(output_dir, name + FORMATS[_job_format(params)])
+    write_rows(data, output_path, list(config.get("selectors", {}).keys()) + ["predicted_categories"])
+    return {"rows": len(data), "output": output_path}
+
+
+def _job_batch(params, output_dir):
+    summary = run_batch(load_batch(params["path"]), output_dir, workers=params.get("workers", 4),
+                        fmt=_job_format(params), max_pages=params.get("max_pages", 3),
+                        retries=params.get("retries", 3), timeout=params.get("timeout", 10))
+    return {k: v for k, v in summary.items() if k != "sites"}
+
+
+def _job_randomurl(params, output_dir):
+    if "folder" in params:
+        raise ValueError("randomurl jobs write to their own job folder; drop the 'folder' param")
+    from autoscraper.randomurl_cli import run_randomurl
+    # the stage cache and incremental state have to outlive the job folder, so they
+    # live in one folder per url/selector set under the output root
+    key = json.dumps([params.get("url"), params.get("selector"), params.get("fields")], sort_keys=True)
+    cache_dir = os.path.join(os.path.dirname(output_dir), "randomurl",
+                             hashlib.sha1(key.encode("utf-8")).hexdigest()[:12])
+    return run_randomurl(**{"cache_dir": cache_dir, **params, "folder": output_dir})
+
+
+def _atcoder_format(params):
+    fmt = params.get("format", "csv")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}' (expected one of: {', '.join(FORMATS)})")
+    return fmt
+
+
+def _job_atcoder(params, output_dir):
+    # imported lazily: these modules build a Cohere client and load sklearn at import time
+    from autoscraper.at_coder_scrape_6_5_cli import pipeline
+    # the service owns the warm browser pool, so the pipeline must not close it
+    pipeline(params.get("max_problems", 5), params.get("clusters", 3), _atcoder_format(params),
+             folder=output_dir, close_browsers=False)
+    return {"folder": output_dir}
+
+
+def _job_phase6_6(params, output_dir):
+    from autoscraper.phase6_6_cli import pipeline
+    pipeline(params.get("max_problems", 10), params.get("clusters", 3), _atcoder_format(params),
+             output_dir, close_browsers=False)
+    return {"folder": output_dir}
+
+
+JOB_HANDLERS = {
+    "config": _job_config,
+    "batch": _job_batch,
+    "randomurl": _job_randomurl,
+    "atcoder": _job_atcoder,
+    "phase6_6": _job_phase6_6,
+}
+
+
+class Service:
+    """
+    Long-running job runner.
+    - Bounded job queue (submit raises queue.Full when saturated) drained by a fixed worker pool.
+    - Cron-style schedules enqueue jobs on the minute.
+    - HTTP session, host scheduler, embedding models and browsers stay warm between jobs.
+    """
+
+    def __init__(self, workers: int = 2, queue_size: int = 16, output_root: str = "service_runs",
+                 history: int = 500):
+        self.workers = workers
+        self.output_root = output_root
+        self.history = history
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._jobs = OrderedDict()
+        self._jobs_lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._threads = []
+        self._schedules = []
+        self._stop = threading.Event()
+
+    # --- resources -------------------------------------------------
+    def warm_up(self, models: bool = True, browsers: int = 0):
+        get_session()
+        get_scheduler()
+        if models:
+            info("Loading embedding models...")
+            import autoscraper.core.enricher  # noqa: F401
+            import autoscraper.core.ai_insights  # noqa: F401
+        if browsers:
+            from autoscraper.core.browser import get_browser_pool
+            get_browser_pool(size=browsers).start()
+        success("Service resources are warm")
+
+    # --- jobs ------------------------------------------------------
+    def submit(self, kind: str, params: dict = None, source: str = "api") -> dict:
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind '{kind}' (expected one of: {', '.join(JOB_HANDLERS)})")
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        job = {
+            "id": f"{stamp}_{next(self._ids):04d}_{kind}",
+            "kind": kind,
+            "params": params or {},
+            "source": source,
+            "status": "queued",
+            "submitted_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "started_at": None,
+            "finished_at": None,
+            "elapsed_s": None,
+            "result": None,
+            "error": None,
+        }
+        self._queue.put_nowait(job)
+        with self._jobs_lock:
+            self._jobs[job["id"]] = job
+            while len(self._jobs) > self.history:
+                self._jobs.popitem(last=False)
+        info("Queued job %s (%s)", job["id"], source, job=job["id"])
+        return job
+
+    def get(self, job_id: str):
+        """Snapshot of one job, safe to serialize while its worker updates it."""
+        with self._jobs_lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def list_jobs(self) -> list:
+        with self._jobs_lock:
+            return [dict(job) for job in self._jobs.values()]
+
+    def _update(self, job: dict, **fields):
+        with self._jobs_lock:
+            job.update(fields)
+
+    def stats(self) -> dict:
+        jobs = self.list_jobs()
+        return {
+            "workers": self.workers,
+            "queue_size": self._queue.maxsize,
+            "queued": sum(1 for j in jobs if j["status"] == "queued"),
+            "running": sum(1 for j in jobs if j["status"] == "running"),
+            "done": sum(1 for j in jobs if j["status"] == "done"),
+            "failed": sum(1 for j in jobs if j["status"] == "failed"),
+            "cancelled": sum(1 for j in jobs if j["status"] == "cancelled"),
+            "schedules": [{"name": n, "cron": c.expr, "kind": k} for n, c, k, _ in self._schedules],
+            "hosts": get_scheduler().snapshot(),
+        }
+
+    def _worker(self):
+        while not self._stop.is_set():
+            try:
+                job = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if self._stop.is_set():
+                self._cancel(job)
+                return
+            self._update(job, status="running", started_at=datetime.datetime.now().isoformat(timespec="seconds"))
+            start = time.perf_counter()
+            since = get_metrics().snapshot()
+            output_dir = os.path.join(self.output_root, job["id"])
+            try:
+                os.makedirs(output_dir, exist_ok=True)
+                with get_metrics().stage(f"job:{job['kind']}"):
+                    result = JOB_HANDLERS[job["kind"]](job["params"], output_dir)
+                self._update(job, status="done", result=result)
+                success("Job %s done in %.1fs", job["id"], time.perf_counter() - start, job=job["id"])
+            except Exception as e:
+                self._update(job, status="failed", error=str(e))
+                error("Job %s failed: %s", job["id"], e, job=job["id"])
+                debug("%s", traceback.format_exc())
+            finally:
+                self._update(job, finished_at=datetime.datetime.now().isoformat(timespec="seconds"),
+                             elapsed_s=round(time.perf_counter() - start, 3))
+                # concurrent jobs share the process registry, so this covers the job's wall-clock window
+                try:
+                    export_run(os.path.join(output_dir, "run_metrics.json"), since)
+                except OSError as e:
+                    error("Could not write metrics for job %s: %s", job["id"], e)
+
+    # --- schedules -------------------------------------------------
+    def add_schedule(self, name: str, cron: str, kind: str, params: dict = None):
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind '{kind}' in schedule '{name}'")
+        self._schedules.append((name, CronSchedule(cron), kind, params or {}))
+        info("Scheduled '%s' (%s) -> %s", name, cron, kind)
+
+    def load_schedules(self, path: str):
+        """Load [{"name", "cron", "kind", "params"}, ...] from a JSON file."""
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        for i, entry in enumerate(entries):
+            self.add_schedule(entry.get("name", f"schedule_{i}"), entry["cron"], entry["kind"], entry.get("params"))
+
+    def _scheduler_loop(self):
+        last_minute = None
+        while not self._stop.is_set():
+            now = datetime.datetime.now().replace(second=0, microsecond=0)
+            if now != last_minute:
+                last_minute = now
+                for name, cron, kind, params in self._schedules:
+                    if cron.matches(now):
+                        try:
+                            self.submit(kind, params, source=f"schedule:{name}")
+                        except queue.Full:
+                            warning("Queue full; skipped scheduled run of '%s'", name)
+            self._stop.wait(1)
+
+    # --- lifecycle -------------------------------------------------
+    def start(self):
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        if self._schedules:
+            t = threading.Thread(target=self._scheduler_loop, name="job-scheduler", daemon=True)
+            t.start()
+            self._threads.append(t)
+        success("Service started with %d workers (queue size %d)", self.workers, self._queue.maxsize)
+
+    def _cancel(self, job: dict):
+        self._update(job, status="cancelled", finished_at=datetime.datetime.now().isoformat(timespec="seconds"))
+        info("Cancelled job %s", job["id"], job=job["id"])
+
+    def stop(self, timeout: float = 30):
+        """
+        Cancel queued jobs and wait up to `timeout` seconds in total for running
+        ones; workers are daemon threads, so a job still running is abandoned.
+        """
+        self._stop.set()
+        while True:
+            try:
+                self._cancel(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        deadline = time.monotonic() + timeout
+        for t in self._threads:
+            t.join(timeout=max(0.0, deadline - time.monotonic()))
+        running = [t.name for t in self._threads if t.is_alive()]
+        if running:
+            warning("Stopping with jobs still running in %s", ", ".join(running))
+        self._threads = []
+        from autoscraper.core.browser import close_browser_pool
+        close_browser_pool()
+        info("Service stopped")
+
+
+def _make_handler(service: Service):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code, payload, headers=None):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = self.path.rstrip("/")
+            if path == "/health":
+                self._send(200, {"status": "ok", **service.stats()})
+            elif path == "/metrics":
+                body = get_metrics().to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            elif path == "/jobs":
+                self._send(200, service.list_jobs())
+            elif path.startswith("/jobs/"):
+                job = service.get(path[len("/jobs/"):])
+                if job is None:
+                    self._send(404, {"error": "job not found"})
+                else:
+                    self._send(200, job)
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path.rstrip("/") != "/jobs":
+                self._send(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                job = service.submit(body.get("kind"), body.get("params"))
+            except queue.Full:
+                self._send(429, {"error": "job queue is full, retry later"}, {"Retry-After": "30"})
+                return
+            except (ValueError, TypeError) as e:
+                self._send(400, {"error": str(e)})
+                return
+            self._send(202, {"id": job["id"], "status": job["status"]})
+
+        def log_message(self, format, *args):
+            # client_address is empty on Unix sockets, so skip the default formatter
+            info("[API] " + format, *args)
+
+    return Handler
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service: Service, host: str = "127.0.0.1", port: int = 8765, socket_path: str = None):
+    """HTTP API over TCP (localhost by default) or a Unix socket."""
+    handler = _make_handler(service)
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = _UnixHTTPServer(socket_path, handler)
+        info("Service API listening on unix:%s", socket_path)
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        info("Service API listening on http://%s:%d", host, server.server_port)
+    return server
@@ -0,0 +1,126 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Columns holding Python lists; text formats store them as JSON arrays.
+LIST_COLUMNS = ("predicted_categories",)
+
+# --format value -> file extension
+FORMATS = {
+    "csv": ".csv",
+    "csv.zst": ".csv.zst",
+    "csv.gz": ".csv.gz",
+    "jsonl": ".jsonl",
+    "jsonl.gz": ".jsonl.gz",
+    "jsonl.zst": ".jsonl.zst",
+    "parquet": ".parquet",
+    "json": ".json",
+}
+
+
+def format_of(path: str) -> str:
+    """Infer the format key from a file name (longest matching extension wins)."""
+    name = path.lower()
+    for fmt, ext in sorted(FORMATS.items(), key=lambda kv: -len(kv[1])):
+        if name.endswith(ext):
+            return fmt
+    raise ValueError(f"Unsupported output format for '{path}' (expected one of: {', '.join(FORMATS)})")
+
+
+def with_format(path: str, fmt: str) -> str:
+    """Swap the extension of `path` for the one belonging to `fmt`."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}' (expected one of: {', '.join(FORMATS)})")
+    try:
+        stem = path[: -len(FORMATS[format_of(path)])]
+    except ValueError:
+        stem = os.path.splitext(path)[0]
+    return stem + FORMATS[fmt]
+
+
+def _require(module: str, fmt: str):
+    try:
+        __import__(module)
+    except ImportError:
+        raise RuntimeError(f"The '{fmt}' format needs the '{module}' package (pip install {module})")
+
+
+def _encode_lists(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    for col in df.columns:
+        if df[col].map(lambda v: isinstance(v, (list, tuple))).any():
+            df[col] = df[col].map(lambda v: json.dumps(list(v), ensure_ascii=False) if isinstance(v, (list, tuple)) else v)
+    return df
+
+
+def _decode_lists(df: pd.DataFrame) -> pd.DataFrame:
+    def parse(v):
+        if isinstance(v, str) and v.startswith("["):
+            try:
+                return json.loads(v)
+            except ValueError:
+                return v
+        return v
+
+    for col in LIST_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].map(parse)
+    return df
+
+
+def write_table(data, path: str, columns: list = None):
+    """
+    Write rows (list of dicts or DataFrame) in the format implied by `path`:
+    .csv[.gz|.zst], .jsonl[.gz|.zst], .parquet, or .json (pretty array).
+    List values stay native in Parquet/JSON(L) and become JSON arrays in CSV.
+    """
+    fmt = format_of(path)
+    if fmt == "json" and not isinstance(data, pd.DataFrame):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        return path
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data, columns=columns)
+    if columns is not None and isinstance(data, pd.DataFrame):
+        df = df.reindex(columns=columns)
+
+    if fmt.startswith("csv"):
+        if fmt == "csv.zst":
+            _require("zstandard", fmt)
+        _encode_lists(df).to_csv(path, index=False, encoding="utf-8")
+    elif fmt.startswith("jsonl"):
+        if fmt == "jsonl.zst":
+            _require("zstandard", fmt)
+        df.to_json(path, orient="records", lines=True, force_ascii=False)
+    elif fmt == "parquet":
+        _require("pyarrow", fmt)
+        df.to_parquet(path, index=False, engine="pyarrow", compression="zstd")
+    else:
+        records = df.astype(object).where(df.notna(), None).to_dict(orient="records")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(records, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def read_table(path: str) -> pd.DataFrame:
+    """Read any format written by write_table into a DataFrame with list columns restored."""
+    fmt = format_of(path)
+    if fmt.startswith("csv"):
+        if fmt == "csv.zst":
+            _require("zstandard", fmt)
+        return _decode_lists(pd.read_csv(path))
+    if fmt.startswith("jsonl"):
+        if fmt == "jsonl.zst":
+            _require("zstandard", fmt)
+        return pd.read_json(path, orient="records", lines=True, dtype=False)
+    if fmt == "parquet":
+        _require("pyarrow", fmt)
+        df = pd.read_parquet(path, engine="pyarrow")
+        for col in df.columns:
+            # pyarrow hands list columns back as numpy arrays
+            if df[col].dtype == object and df[col].map(lambda v: isinstance(v, np.ndarray)).any():
+                df[col] = df[col].map(lambda v: v.tolist() if isinstance(v, np.ndarray) else v)
+        return df
+    with open(path, "r", encoding="utf-8") as f:
+        return pd.DataFrame(json.load(f))
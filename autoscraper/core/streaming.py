@@ -0,0 +1,185 @@
+import functools
+import time
+from urllib.parse import urljoin, urlparse
+
+import requests
+from cssselect import GenericTranslator
+from cssselect.xpath import ExpressionError
+from lxml import etree
+from requests.utils import get_encoding_from_headers
+
+from autoscraper.utils.logger import debug, info, error
+from autoscraper.utils.metrics import get_metrics, record_fetch
+from autoscraper.core.scraper import get_session
+from autoscraper.core.throttle import get_scheduler, THROTTLE_STATUSES
+
+# Tags whose text BeautifulSoup's get_text() leaves out when called on an ancestor
+_NON_TEXT_TAGS = {"script", "style", "template"}
+
+
+class _BackwardTranslator(GenericTranslator):
+    """
+    CSS -> XPath anchored at the candidate element and looking only backwards
+    (ancestors, earlier siblings), so it can be evaluated the moment an element
+    closes while the rest of the document is still downloading.
+    """
+
+    def xpath_descendant_combinator(self, left, right):
+        return right.add_condition(f"ancestor::{left}")
+
+    def xpath_child_combinator(self, left, right):
+        return right.add_condition(f"parent::{left}")
+
+    def xpath_direct_adjacent_combinator(self, left, right):
+        return right.add_condition(f"preceding-sibling::*[1][self::{left}]")
+
+    def xpath_indirect_adjacent_combinator(self, left, right):
+        return right.add_condition(f"preceding-sibling::{left}")
+
+    def _needs_following(self, *args):
+        raise ExpressionError("selectors that look at following siblings or :has() cannot be streamed")
+
+    xpath_last_child_pseudo = xpath_last_of_type_pseudo = _needs_following
+    xpath_only_child_pseudo = xpath_only_of_type_pseudo = _needs_following
+    xpath_nth_last_child_function = xpath_nth_last_of_type_function = _needs_following
+    xpath_relation_descendant_combinator = xpath_relation_child_combinator = _needs_following
+    xpath_relation_direct_adjacent_combinator = xpath_relation_indirect_adjacent_combinator = _needs_following
+
+
+_translator = _BackwardTranslator()
+
+
+@functools.lru_cache(maxsize=256)
+def compile_selector(css: str) -> etree.XPath:
+    """Compiled `self::...` XPath that is true for an element matching `css`."""
+    try:
+        return etree.XPath(_translator.css_to_xpath(css, prefix="self::"))
+    except ExpressionError as e:
+        raise ValueError(f"Selector '{css}' cannot be used in streaming mode: {e}")
+
+
+def _strings(el):
+    if isinstance(el.tag, str) and el.tag not in _NON_TEXT_TAGS and el.text:
+        yield el.text
+    for child in el:
+        if isinstance(child.tag, str) and child.tag not in _NON_TEXT_TAGS:
+            yield from _strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def element_text(el) -> str:
+    """Same result as BeautifulSoup's el.get_text(strip=True)."""
+    if not len(el) or el.tag in _NON_TEXT_TAGS:
+        return (el.text or "").strip()
+    return "".join(s.strip() for s in _strings(el))
+
+
+def _collapse(el):
+    # The subtree has been matched; keep the element (ancestor and sibling
+    # predicates still see it) but replace its children by their text.
+    if len(el):
+        el.text = element_text(el)
+        del el[:]
+
+
+def _parse_stream(response, page_url, selectors, pagination_selector, item_limit, stop_selector, chunk_size):
+    compiled = {key: compile_selector(css) for key, css in selectors.items()}
+    next_xpath = compile_selector(pagination_selector) if pagination_selector else None
+    stop_xpath = compile_selector(stop_selector) if stop_selector else None
+
+    content_type = response.headers.get("Content-Type", "")
+    encoding = get_encoding_from_headers(response.headers) if "charset" in content_type.lower() else None
+    parser = etree.HTMLPullParser(events=("end",), encoding=encoding)
+    columns = {key: [] for key in selectors}
+    next_url = None
+    nbytes = 0
+    stopped = False
+
+    def handle(el):
+        nonlocal next_url, stopped
+        if not isinstance(el.tag, str):
+            return
+        for key, xpath in compiled.items():
+            if xpath(el):
+                columns[key].append(element_text(el))
+        if next_url is None and next_xpath is not None and el.get("href") and next_xpath(el):
+            next_url = urljoin(page_url, el.get("href"))
+        if stop_xpath is not None and stop_xpath(el):
+            stopped = True
+        elif item_limit and min(len(v) for v in columns.values()) >= item_limit:
+            # the next link usually comes after the items, so keep going until it is found
+            stopped = next_xpath is None or next_url is not None
+        _collapse(el)
+
+    for chunk in response.iter_content(chunk_size):
+        nbytes += len(chunk)
+        parser.feed(chunk)
+        for _, el in parser.read_events():
+            handle(el)
+            if stopped:
+                break
+        if stopped:
+            break
+    if not stopped:
+        try:
+            parser.close()
+        except etree.XMLSyntaxError:
+            # empty or whitespace-only body: no elements, same as the buffered path
+            pass
+        for _, el in parser.read_events():
+            handle(el)
+    if item_limit:
+        columns = {key: values[:item_limit] for key, values in columns.items()}
+    return columns, next_url, nbytes, stopped
+
+
+def stream_page(url: str, selectors: dict, pagination_selector: str = None, item_limit: int = None,
+                stop_selector: str = None, retries=3, backoff=1, timeout=10, scheduler=None,
+                chunk_size: int = 64 * 1024):
+    """
+    Fetch `url` and parse it while it downloads, returning
+    {"columns", "next", "bytes", "stopped_early"} or None after `retries` failures.
+    Elements are matched as they close and then collapsed to their text. They
+    stay in the tree until the page is done, because selectors may refer to
+    ancestors and earlier siblings, so memory grows with the number of elements
+    rather than with their markup. Reading stops once `stop_selector` closes,
+    or once every selector has `item_limit` matches (and the pagination link,
+    if any, has been seen).
+    """
+    scheduler = scheduler or get_scheduler()
+    session = get_session()
+    host = urlparse(url).netloc
+    for attempt in range(1, retries + 1):
+        try:
+            debug("Streaming %s (attempt %d)", url, attempt, url=url, attempt=attempt)
+            with scheduler.slot(url) as slot:
+                start = time.perf_counter()
+                try:
+                    with session.get(url, timeout=timeout, stream=True) as response:
+                        slot.record(response.status_code, response.headers)
+                        response.raise_for_status()
+                        columns, next_url, nbytes, stopped = _parse_stream(
+                            response, url, selectors, pagination_selector, item_limit, stop_selector, chunk_size)
+                except requests.HTTPError as e:
+                    record_fetch(url, e.response.status_code, time.perf_counter() - start)
+                    raise
+                except requests.RequestException:
+                    record_fetch(url, "error", time.perf_counter() - start)
+                    raise
+                record_fetch(url, response.status_code, time.perf_counter() - start, nbytes)
+            if stopped:
+                get_metrics().inc("stream_early_stops_total", host=host)
+            return {"columns": columns, "next": next_url, "bytes": nbytes, "stopped_early": stopped}
+        except requests.RequestException as e:
+            error("Error fetching %s: %s", url, e, url=url, attempt=attempt)
+            if attempt == retries:
+                error("Max retries reached for %s. Skipping.", url, url=url)
+                return None
+            get_metrics().inc("fetch_retries_total", host=host)
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            if status in THROTTLE_STATUSES:
+                continue
+            wait = backoff * (2 ** (attempt - 1))
+            info("Retrying in %s seconds...", wait)
+            time.sleep(wait)
@@ -0,0 +1,260 @@
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+from autoscraper.utils.logger import info, warning
+
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class _HostState:
+    def __init__(self, rate, concurrency):
+        self.rate = rate
+        self.tokens = 1.0
+        self.last_refill = time.monotonic()
+        self.concurrency = float(concurrency)
+        self.active = 0
+        self.successes = 0
+        self.error_rate = 0.0
+        self.blocked_until = 0.0
+        self.crawl_delay = None
+        self.robots_loaded = False
+        self.robots_lock = threading.Lock()
+
+    @property
+    def limit(self):
+        return max(1, int(self.concurrency))
+
+    def refill(self, now, burst):
+        elapsed = now - self.last_refill
+        self.last_refill = now
+        self.tokens = min(burst, self.tokens + elapsed * self.rate)
+
+
+class Slot:
+    """Handle for one in-flight request; call record() with the response status/headers."""
+
+    def __init__(self, host):
+        self.host = host
+        self.status = None
+        self.retry_after = None
+
+    def record(self, status, headers=None):
+        self.status = status
+        if headers is not None:
+            self.retry_after = parse_retry_after(headers.get("Retry-After") or headers.get("retry-after"))
+
+
+class HostScheduler:
+    """
+    Per-host politeness scheduler.
+    - Token bucket per host caps the request rate.
+    - Concurrency per host grows additively while latency/error rate stay healthy
+      and is cut multiplicatively on 429/503 or sustained errors (AIMD).
+    - Honours Retry-After and robots.txt Crawl-delay.
+    """
+
+    def __init__(self, initial_rate: float = 1.0, min_rate: float = 0.1, max_rate: float = 10.0,
+                 rate_step: float = 0.5, initial_concurrency: int = 1, max_concurrency: int = 8,
+                 burst: float = 2.0, latency_target: float = 2.0, error_threshold: float = 0.2,
+                 respect_robots: bool = True, user_agent: str = "*", robots_timeout: float = 5):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate_step = rate_step
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.burst = burst
+        self.latency_target = latency_target
+        self.error_threshold = error_threshold
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+        self.robots_timeout = robots_timeout
+        self._hosts = {}
+        self._cond = threading.Condition()
+
+    def _state(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = _HostState(self.initial_rate, self.initial_concurrency)
+            self._hosts[host] = state
+        return state
+
+    def _load_robots(self, url, state):
+        with state.robots_lock:
+            if state.robots_loaded:
+                return
+            parts = urlsplit(url)
+            robots_url = f"{parts.scheme}://{parts.netloc}/robots.txt"
+            delay = None
+            try:
+                resp = requests.get(robots_url, timeout=self.robots_timeout)
+                if resp.status_code == 200:
+                    parser = RobotFileParser()
+                    parser.parse(resp.text.splitlines())
+                    delay = parser.crawl_delay(self.user_agent)
+                    rate = parser.request_rate(self.user_agent)
+                    if delay is None and rate is not None and rate.requests:
+                        delay = rate.seconds / rate.requests
+            except requests.RequestException:
+                pass
+            with self._cond:
+                if delay:
+                    self.set_crawl_delay(parts.netloc, float(delay))
+                state.robots_loaded = True
+
+    def set_crawl_delay(self, host: str, delay: float):
+        """Pin a host to at most one request every `delay` seconds."""
+        with self._cond:
+            state = self._state(host)
+            state.crawl_delay = delay
+            state.rate = min(state.rate, 1.0 / delay)
+            state.tokens = min(state.tokens, 1.0)
+            info("Crawl-delay for %s: %ss", host, delay)
+
+    def _max_rate(self, state):
+        if state.crawl_delay:
+            return min(self.max_rate, 1.0 / state.crawl_delay)
+        return self.max_rate
+
+    def acquire(self, url: str) -> Slot:
+        """Block until the host of `url` has a free slot and a token."""
+        host = urlsplit(url).netloc
+        with self._cond:
+            state = self._state(host)
+        if self.respect_robots and not state.robots_loaded:
+            self._load_robots(url, state)
+
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                burst = 1.0 if state.crawl_delay else self.burst
+                state.refill(now, burst)
+                if now < state.blocked_until:
+                    wait = state.blocked_until - now
+                elif state.active >= state.limit:
+                    wait = None
+                elif state.tokens < 1.0:
+                    wait = (1.0 - state.tokens) / state.rate
+                else:
+                    state.tokens -= 1.0
+                    state.active += 1
+                    return Slot(host)
+                self._cond.wait(wait)
+
+    def release(self, slot: Slot, latency: float = None, failed: bool = False):
+        """Feed the outcome of a request back into the host's AIMD state."""
+        with self._cond:
+            state = self._state(slot.host)
+            state.active = max(0, state.active - 1)
+            throttled = slot.status in THROTTLE_STATUSES
+            errored = failed or throttled or (slot.status is not None and slot.status >= 500)
+            state.error_rate = 0.8 * state.error_rate + (0.2 if errored else 0.0)
+
+            unhealthy = state.error_rate > self.error_threshold
+            # only the failing responses cut the limits; successes while the
+            # error rate decays neither cut nor grow them
+            if errored and (throttled or unhealthy):
+                state.concurrency = max(1.0, state.concurrency / 2)
+                state.rate = max(self.min_rate, state.rate / 2)
+                state.tokens = min(state.tokens, 0.0)
+                state.successes = 0
+                if throttled:
+                    delay = slot.retry_after if slot.retry_after is not None else 1.0 / state.rate
+                    state.blocked_until = max(state.blocked_until, time.monotonic() + delay)
+                    warning("Throttled by %s (HTTP %s); backing off %.1fs, concurrency=%d, rate=%.2f/s",
+                            slot.host, slot.status, delay, state.limit, state.rate, host=slot.host, status=slot.status)
+            elif not errored and not unhealthy and (latency is None or latency <= self.latency_target):
+                state.successes += 1
+                if state.successes >= state.limit:
+                    state.successes = 0
+                    state.concurrency = min(float(self.max_concurrency), state.concurrency + 1)
+                    state.rate = min(self._max_rate(state), state.rate + self.rate_step)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, url: str):
+        """
+        Context manager around one request:
+
+            with scheduler.slot(url) as slot:
+                resp = session.get(url)
+                slot.record(resp.status_code, resp.headers)
+        """
+        slot = self.acquire(url)
+        start = time.monotonic()
+        failed = False
+        try:
+            yield slot
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self.release(slot, time.monotonic() - start, failed=failed or slot.status is None)
+
+    def limit(self, host: str) -> int:
+        """Concurrency currently allowed for `host` (0 while it is backing off)."""
+        with self._cond:
+            state = self._state(host)
+            if time.monotonic() < state.blocked_until:
+                return 0
+            return state.limit
+
+    def snapshot(self) -> dict:
+        """Current per-host rate/concurrency, for logging and reports."""
+        with self._cond:
+            return {
+                host: {
+                    "rate": round(s.rate, 3),
+                    "concurrency": s.limit,
+                    "active": s.active,
+                    "error_rate": round(s.error_rate, 3),
+                    "crawl_delay": s.crawl_delay,
+                }
+                for host, s in self._hosts.items()
+            }
+
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+
+def get_scheduler() -> HostScheduler:
+    """Process-wide scheduler shared by every fetch path."""
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = HostScheduler()
+        return _default_scheduler
+
+
+def set_scheduler(scheduler: HostScheduler):
+    """Replace the process-wide scheduler (e.g. an unthrottled one for local benchmarks)."""
+    global _default_scheduler
+    with _default_lock:
+        _default_scheduler = scheduler
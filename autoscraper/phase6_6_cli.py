@@ -2,13 +2,14 @@ import os
 import datetime
 import time
 import requests
-import pandas as pd
 import typer
 from dotenv import load_dotenv
-from autoscraper.utils.logger import info, success, error
-import json
-from playwright.sync_api import sync_playwright
-import cohere
+from autoscraper.utils.logger import debug, info, success, error
+from autoscraper.core.throttle import get_scheduler
+from autoscraper.core.browser import get_browser_pool, close_browser_pool
+from autoscraper.core.storage import FORMATS, write_table
+from autoscraper.utils.metrics import get_metrics, record_fetch, record_embedding, llm_call, export_run, profiling
+from autoscraper.utils.cohere_client import get_cohere_client
 import numpy as np
 from sklearn.cluster import KMeans
 
@@ -19,15 +20,15 @@ app = typer.Typer(help="AtCoder/Codeforces Scraper + AI Insights + Split by Tag/
 # Example using AtCoder API for reliability
 API_URL = "https://kenkoooo.com/atcoder/resources/problems.json"
 BASE_PROBLEM_URL = "https://atcoder.jp/contests"
-COHERE_API_KEY = os.getenv("COHERE_API_KEY")
-if not COHERE_API_KEY:
-    raise RuntimeError("COHERE_API_KEY not found in environment variables!")
-co = cohere.Client(COHERE_API_KEY)
+co = get_cohere_client()
 # ==========================================================
 
 def fetch_problems(max_problems):
-    info(f"[Phase 6.6] Fetching top {max_problems} problems from AtCoder API…")
-    resp = requests.get(API_URL, timeout=15)
+    info("[Phase 6.6] Fetching top %d problems from AtCoder API…", max_problems)
+    with get_scheduler().slot(API_URL) as slot:
+        resp = requests.get(API_URL, timeout=15)
+        slot.record(resp.status_code, resp.headers)
+    record_fetch(API_URL, resp.status_code, resp.elapsed.total_seconds(), len(resp.content))
     resp.raise_for_status()
     problems = resp.json()[:max_problems]
     # Add url field
@@ -42,29 +43,22 @@ def fetch_problem_statement_playwright(problem):
     task_id = problem.get("id")
     url = f"{BASE_PROBLEM_URL}/{contest_id}/tasks/{task_id}"
 
-    info(f"[FETCH] Opening {url}")
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)  # set False if you want to see it
-        page = browser.new_page()
-        page.set_default_timeout(600)  # extend timeout
-        try:
-            page.goto(url, timeout=600)
-            # Wait for the main problem container
-            page.wait_for_selector("div.part", timeout=600)
-            html = page.content()
-        except Exception as e:
-            error(f"[FETCH FAIL] {task_id}: {e}")
-            html = ""
-        finally:
-            browser.close()
-        return html
+    debug("[FETCH] Opening %s", url, url=url)
+    try:
+        # Wait for the main problem container
+        return get_browser_pool().fetch(url, wait_selector="div.part", timeout_ms=600, wait_timeout_ms=600)
+    except Exception as e:
+        error("[FETCH FAIL] %s: %s", task_id, e, url=url)
+        return ""
 
 
 def cluster_problems_with_cohere(texts, k=5):
     if len(texts) < k:
         k = len(texts)
     info("Clustering with Cohere embeddings...")
-    embeddings = co.embed(texts=texts, model="embed-english-light-v3.0").embeddings
+    start = time.perf_counter()
+    embeddings = llm_call(co.embed, "embed", texts=texts, model="embed-english-light-v3.0").embeddings
+    record_embedding("cohere/embed-english-light-v3.0", len(texts), time.perf_counter() - start)
     kmeans = KMeans(n_clusters=k, random_state=42)
     return kmeans.fit_predict(embeddings)
 
@@ -77,7 +71,7 @@ Include:
 2. Key points to focus on.
 3. A sample input/output with an explanation.
 """
-    resp = co.chat(model="command-r-plus", message=prompt)
+    resp = llm_call(co.chat, "chat", model="command-r-plus", message=prompt)
     return resp.text.strip()
 
 def generate_starter_code(teaching_version):
@@ -90,46 +84,50 @@ Generate a Python starter code template with:
 - Writing output to stdout
 - A function skeleton with TODOs
 """
-    resp = co.chat(model="command-r-plus", message=prompt)
+    resp = llm_call(co.chat, "chat", model="command-r-plus", message=prompt)
     return resp.text.strip()
 
-@app.command()
-def run_pipeline(max_problems: int = 10, clusters: int = 3):
-    info(f"[Phase 6.6] Starting pipeline for {max_problems} problems")
-
-    problems = fetch_problems(max_problems)
-    statements = []
-    for p in problems:
-        try:
-            html = fetch_problem_statement_playwright(p)
-            statements.append(html)
-        except Exception as e:
-            error(f"Failed fetching {p.get('id')}: {e}")
-            statements.append("")
+def pipeline(max_problems: int, clusters: int, fmt: str, folder: str, close_browsers: bool = True):
+    metrics = get_metrics()
+    since = metrics.snapshot()
+    info("[Phase 6.6] Starting pipeline for %d problems", max_problems)
+
+    with metrics.stage("fetch_statements"):
+        problems = fetch_problems(max_problems)
+        statements = []
+        for p in problems:
+            try:
+                html = fetch_problem_statement_playwright(p)
+                statements.append(html)
+            except Exception as e:
+                error("Failed fetching %s: %s", p.get("id"), e)
+                statements.append("")
+        if close_browsers:
+            close_browser_pool()
 
     # Attach statements
     for p, s in zip(problems, statements):
         p["statement"] = s
 
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    folder = f"phase6_6_runs_{timestamp}"
     os.makedirs(folder, exist_ok=True)
 
     # Cluster
-    labels = cluster_problems_with_cohere([p["statement"] for p in problems], clusters)
-    for i, lbl in enumerate(labels):
-        problems[i]["cluster"] = int(lbl)
+    with metrics.stage("cluster"):
+        labels = cluster_problems_with_cohere([p["statement"] for p in problems], clusters)
+        for i, lbl in enumerate(labels):
+            problems[i]["cluster"] = int(lbl)
 
     # Generate teaching versions and starter codes
     starter_folder = os.path.join(folder, "starter_codes")
     os.makedirs(starter_folder, exist_ok=True)
-    for p in problems:
-        tv = generate_teaching_version(p["statement"])
-        p["teaching_version"] = tv
-        starter = generate_starter_code(tv)
-        p["starter_code"] = starter
-        with open(os.path.join(starter_folder, f"{p['id']}.py"), "w", encoding="utf-8") as f:
-            f.write(starter)
+    with metrics.stage("teaching"):
+        for p in problems:
+            tv = generate_teaching_version(p["statement"])
+            p["teaching_version"] = tv
+            starter = generate_starter_code(tv)
+            p["starter_code"] = starter
+            with open(os.path.join(starter_folder, f"{p['id']}.py"), "w", encoding="utf-8") as f:
+                f.write(starter)
 
     # Save grouped by tags/difficulty
     by_tag = {}
@@ -141,16 +139,31 @@ def run_pipeline(max_problems: int = 10, clusters: int = 3):
             by_tag.setdefault(tag, []).append(p)
     for tag, group in by_tag.items():
         safe_tag = tag.replace("/", "_")
-        pd.DataFrame(group).to_csv(os.path.join(folder, f"group_tag_{safe_tag}.csv"), index=False)
+        write_table(group, os.path.join(folder, f"group_tag_{safe_tag}{FORMATS[fmt]}"))
 
     # Save everything
-    pd.DataFrame(problems).to_csv(os.path.join(folder, "all_problems.csv"), index=False)
-    with open(os.path.join(folder, "all_problems.json"), "w", encoding="utf-8") as f:
-        json.dump(problems, f, indent=2, ensure_ascii=False)
-
-    success(f"[Phase 6.6] All data saved in {folder}")
-    success(f"[Phase 6.6] Starter templates saved in {starter_folder}")
+    all_problems = os.path.join(folder, f"all_problems{FORMATS[fmt]}")
+    all_problems_json = os.path.join(folder, "all_problems.json")
+    write_table(problems, all_problems)
+    if all_problems_json != all_problems:
+        write_table(problems, all_problems_json)
+    export_run(os.path.join(folder, "run_metrics.json"), since)
+
+    success("[Phase 6.6] All data saved in %s", folder)
+    success("[Phase 6.6] Starter templates saved in %s", starter_folder)
     success("[Phase 6.6] Pipeline complete 🚀🔥")
 
+
+@app.command()
+def run_pipeline(max_problems: int = 10, clusters: int = 3,
+                 fmt: str = typer.Option("csv", "--format", help=f"Table format: {', '.join(FORMATS)}"),
+                 profile: bool = typer.Option(False, "--profile", help="Write cProfile/tracemalloc output to the run folder")):
+    if fmt not in FORMATS:
+        error("Unknown format '%s' (expected one of: %s)", fmt, ", ".join(FORMATS))
+        raise typer.Exit(code=1)
+    folder = f"phase6_6_runs_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    with profiling(folder, enabled=profile):
+        pipeline(max_problems, clusters, fmt, folder)
+
 if __name__ == "__main__":
     app()
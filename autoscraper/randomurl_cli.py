@@ -1,28 +1,180 @@
 import os
+import json
 import datetime
-import pandas as pd
+from typing import List
 import typer
-from dotenv import load_dotenv
 
 # --- Autoscraper internal imports ---
 from autoscraper.utils.logger import info, success, error
 from autoscraper.core.scraper import scrape_with_pagination
+from autoscraper.core.delta import DeltaState, scrape_delta, state_path_for
+from autoscraper.core.memo import Stage, StageCache, check_rerun_from
+from autoscraper.core.storage import FORMATS, write_table
+from autoscraper.utils.metrics import get_metrics, export_run, profiling
 from autoscraper.core.eda import run_eda
-from autoscraper.core.enricher import semantic_enrich
-from autoscraper.core.ai_insights import run_ai_insights
+from autoscraper.core.enricher import semantic_enrich, MODEL_NAME as ENRICH_MODEL
+from autoscraper.core.ai_insights import run_ai_insights, MODEL_NAME as CLUSTER_MODEL
 from autoscraper.core.gpt_cluster_describer import describe_clusters
 
-# --- Load environment ---
-load_dotenv()
-import cohere
-COHERE_API_KEY = os.getenv("COHERE_API_KEY")
-if not COHERE_API_KEY:
-    raise RuntimeError("COHERE_API_KEY not found in environment variables!")
-co = cohere.Client(COHERE_API_KEY)
-
 # --- Typer app ---
 app = typer.Typer(help="Random URL scraping and AI enrichment CLI")
 
+def run_randomurl(url: str, selector: str, pagination_selector: str = None, max_pages: int = 3,
+                  sim_threshold: float = 0.9, clusters: int = 5, top_n: int = 5,
+                  model: str = "command-xlarge", folder: str = "randomurl_runs", cache_dir: str = None,
+                  incremental: bool = False, state_dir: str = None, use_cache: bool = True,
+                  explain: bool = False, rerun_from: str = None, fmt: str = "csv",
+                  fields: dict = None, key_fields: list = None, scrape_max_age: int = 600) -> dict:
+    """
+    Scrape -> Clean -> Enrich -> Cluster -> Cohere Summarize.
+    `selector` fills the "data" column; `fields` maps extra column names to selectors.
+    With `incremental`, only rows added or changed since the previous run of the
+    same url/selector go downstream; removed rows are written alongside. Rows are
+    matched between runs on `key_fields` (default: "data"). The state only advances
+    once every stage has succeeded, so a failed run hands the same delta to the next one.
+    `cache_dir` (default: `folder`) keeps what must outlive one run: incremental
+    state (unless `state_dir` is given) and the stage cache.
+    Stages are memoized in <cache_dir>/.stage_cache.json: a rerun reuses every stage
+    whose inputs, parameters and code are unchanged. A cached scrape is reused for
+    at most `scrape_max_age` seconds (0: always scrape), so scheduled reruns still
+    pick up site changes. `explain` only reports that plan.
+    Row tables are written as `fmt` (csv, parquet, jsonl.gz, csv.zst, ...).
+    Timings, fetch/cache/embedding/LLM counters and peak RSS go to randomurl_metrics_<ts>.json.
+    Returns the paths of every artifact written or reused; raises on failure.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}' (expected one of: {', '.join(FORMATS)})")
+    cache_dir = cache_dir or folder
+    os.makedirs(folder, exist_ok=True)
+    os.makedirs(cache_dir, exist_ok=True)
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    selectors = {"data": selector, **(fields or {})}
+
+    def path(name, ext):
+        return os.path.join(folder, f"randomurl_{name}_{timestamp}{FORMATS[ext]}")
+
+    raw_csv = path("raw", fmt)
+    cleaned_csv, summary_json = path("cleaned", fmt), path("summary", "json")
+    enriched_csv = path("enriched", fmt)
+    clustered_csv, ai_insights_json = path("clustered", fmt), path("ai_insights", "json")
+    cluster_descriptions_json = path("cluster_descriptions", "json")
+    outputs = {}
+    # name -> path of each upstream artifact, possibly a cached output of an earlier run
+    artifacts = {}
+    # incremental state of this scrape, saved only once the downstream stages succeed
+    pending = {}
+
+    # STEP 1: Scrape
+    def scrape():
+        if incremental:
+            state_path = state_path_for(state_dir or os.path.join(cache_dir, "state"), url, selectors,
+                                        pagination_selector, key_fields)
+            delta = scrape_delta(url, selectors, pagination_selector, max_pages=max_pages,
+                                 state_path=state_path, key_fields=key_fields, retries=3, timeout=10, save=False)
+            pending.update(path=state_path, state=delta.pop("state"))
+            delta_json = path("delta", "json")
+            with open(delta_json, "w", encoding="utf-8") as f:
+                json.dump({k: (len(v) if isinstance(v, list) else v) for k, v in delta.items()}, f, indent=2)
+            outputs["delta_json"] = delta_json
+            if delta["removed"]:
+                removed_csv = path("removed", fmt)
+                write_table(delta["removed"], removed_csv)
+                outputs["removed_csv"] = removed_csv
+                success(f"Removed rows saved to {removed_csv}")
+            scraped_data = delta["added"] + delta["changed"]
+            if not scraped_data:
+                return False
+        else:
+            scraped_data = scrape_with_pagination(
+                base_url=url,
+                selectors=selectors,
+                pagination_selector=pagination_selector,
+                max_pages=max_pages,
+                retries=3,
+                timeout=10
+            )
+            if not scraped_data:
+                raise ValueError("No data scraped. Check URL or selector.")
+
+        write_table(scraped_data, raw_csv)
+        success(f"Raw scraped data saved to {raw_csv} (rows: {len(scraped_data)})")
+        return True
+
+    # STEP 2: EDA Cleaning
+    def eda():
+        run_eda(artifacts["raw_csv"], cleaned_csv, summary_json)
+        success(f"Cleaned CSV saved to {cleaned_csv}")
+        success(f"EDA summary JSON saved to {summary_json}")
+
+    # STEP 3: Semantic Enrichment
+    def enrich():
+        semantic_enrich(artifacts["cleaned_csv"], enriched_csv, sim_threshold)
+        success(f"Enriched CSV saved to {enriched_csv}")
+
+    # STEP 4: AI Clustering
+    def cluster():
+        run_ai_insights(artifacts["enriched_csv"], ai_insights_json, clusters, output_csv=clustered_csv)
+        success(f"Clustered CSV saved to {clustered_csv}")
+        success(f"AI insights JSON saved to {ai_insights_json}")
+
+    # STEP 5: Cohere cluster summaries
+    def describe():
+        describe_clusters(artifacts["clustered_csv"], cluster_descriptions_json, top_n=top_n, model=model)
+        success(f"Cluster descriptions saved to {cluster_descriptions_json}")
+
+    stages = [
+        Stage("scrape", [], {"url": url, "selectors": selectors, "pagination_selector": pagination_selector,
+                             "max_pages": max_pages, "format": fmt}, {"raw_csv": raw_csv}, scrape,
+              code=[scrape_with_pagination], volatile=incremental or not scrape_max_age,
+              max_age=scrape_max_age),
+        Stage("eda", ["raw_csv"], {"format": fmt}, {"cleaned_csv": cleaned_csv, "summary_json": summary_json}, eda,
+              code=[run_eda]),
+        Stage("enrich", ["cleaned_csv"], {"sim_threshold": sim_threshold, "model": ENRICH_MODEL, "format": fmt},
+              {"enriched_csv": enriched_csv}, enrich, code=[semantic_enrich]),
+        Stage("cluster", ["enriched_csv"], {"clusters": clusters, "model": CLUSTER_MODEL, "format": fmt},
+              {"clustered_csv": clustered_csv, "ai_insights_json": ai_insights_json}, cluster,
+              code=[run_ai_insights]),
+        Stage("describe", ["clustered_csv"], {"top_n": top_n, "model": model},
+              {"cluster_descriptions_json": cluster_descriptions_json}, describe, code=[describe_clusters]),
+    ]
+    check_rerun_from(stages, rerun_from)
+    cache = StageCache(os.path.join(cache_dir, ".stage_cache.json"))
+
+    if explain:
+        cache.explain(stages, rerun_from=rerun_from)
+        return {}
+
+    metrics = get_metrics()
+    since = metrics.snapshot()
+    metrics_json = path("metrics", "json")
+    info(f"[PHASE 6.2] Starting randomurl pipeline for {url}")
+    if incremental:
+        with metrics.stage("scrape"):
+            changed = scrape()
+        if not changed:
+            DeltaState(pending["path"]).save(**pending["state"])
+            export_run(metrics_json, since)
+            success("[PHASE 6.2] No added or changed rows since the last run; downstream stages skipped.")
+            return {**outputs, "metrics_json": metrics_json}
+        artifacts["raw_csv"] = raw_csv
+        stages = stages[1:]
+        # the scrape above always ran, so forcing it means nothing more
+        rerun_from = None if rerun_from == "scrape" else rerun_from
+    if use_cache:
+        cache.run(stages, rerun_from=rerun_from, artifacts=artifacts)
+    else:
+        for stage in stages:
+            with metrics.stage(stage.name):
+                stage.run()
+            artifacts.update(stage.outputs)
+    if pending:
+        DeltaState(pending["path"]).save(**pending["state"])
+
+    export_run(metrics_json, since)
+    success(f"Run metrics saved to {metrics_json}")
+    success("[PHASE 6.2] Randomurl full pipeline completed successfully! 🎯🚀")
+    return {**outputs, **artifacts, "metrics_json": metrics_json}
+
 @app.command()
 def randomurl(
     url: str = typer.Option(..., help="Base URL to scrape"),
@@ -33,6 +185,16 @@ def randomurl(
     clusters: int = typer.Option(5, help="Number of clusters for AI insights"),
     top_n: int = typer.Option(5, help="Top N examples per cluster for summaries"),
     model: str = typer.Option("command-xlarge", help="Cohere model to use for cluster description"),
+    incremental: bool = typer.Option(False, help="Only process rows added/changed since the last run"),
+    state_dir: str = typer.Option(None, help="Where incremental state is kept (default: randomurl_runs/state)"),
+    cache: bool = typer.Option(True, "--cache/--no-cache", help="Reuse stages whose inputs and parameters are unchanged (a cached scrape only for --scrape-max-age)"),
+    scrape_max_age: int = typer.Option(600, help="Seconds a cached scrape may be reused; 0 always refetches"),
+    explain: bool = typer.Option(False, help="Show which stages would be reused or rerun, without running"),
+    rerun_from: str = typer.Option(None, help="Force this stage (scrape/eda/enrich/cluster/describe) and later to rerun"),
+    fmt: str = typer.Option("csv", "--format", help=f"Table format: {', '.join(FORMATS)}"),
+    field: List[str] = typer.Option(None, "--field", help="Extra column as name=selector (repeatable)"),
+    key_field: List[str] = typer.Option(None, "--key-field", help="Column(s) identifying a row across incremental runs (default: data)"),
+    profile: bool = typer.Option(False, "--profile", help="Write cProfile/tracemalloc output to randomurl_runs"),
 ):
     """
     Phase 6.2 Extended:
@@ -40,65 +202,16 @@ def randomurl(
     Each run outputs to its own timestamped files in 'randomurl_runs'.
     """
     try:
-        # Prepare folder and timestamp
-        folder = "randomurl_runs"
-        os.makedirs(folder, exist_ok=True)
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-
-        info(f"[PHASE 6.2] Starting randomurl pipeline for {url}")
-
-        # STEP 1: Scrape
-        selectors = {"data": selector}
-        scraped_data = scrape_with_pagination(
-            base_url=url,
-            selectors=selectors,
-            pagination_selector=pagination_selector,
-            max_pages=max_pages,
-            retries=3,
-            timeout=10
-        )
-        if not scraped_data:
-            error("No data scraped. Check URL or selector.")
-            raise typer.Exit(code=1)
-
-        raw_csv = os.path.join(folder, f"randomurl_raw_{timestamp}.csv")
-        pd.DataFrame(scraped_data).to_csv(raw_csv, index=False, encoding="utf-8")
-        success(f"Raw scraped data saved to {raw_csv} (rows: {len(scraped_data)})")
-
-        # STEP 2: EDA Cleaning
-        cleaned_csv = os.path.join(folder, f"randomurl_cleaned_{timestamp}.csv")
-        summary_json = os.path.join(folder, f"randomurl_summary_{timestamp}.json")
-        run_eda(raw_csv, cleaned_csv, summary_json)
-        success(f"Cleaned CSV saved to {cleaned_csv}")
-        success(f"EDA summary JSON saved to {summary_json}")
-
-        # STEP 3: Semantic Enrichment
-        enriched_csv = os.path.join(folder, f"randomurl_enriched_{timestamp}.csv")
-        semantic_enrich(cleaned_csv, enriched_csv, sim_threshold)
-        success(f"Enriched CSV saved to {enriched_csv}")
-
-        # STEP 4: AI Clustering
-        ai_insights_json = os.path.join(folder, f"randomurl_ai_insights_{timestamp}.json")
-        run_ai_insights(enriched_csv, ai_insights_json, clusters)
-
-        # Move/rename the default output to a unique run-based file
-        clustered_csv = os.path.join(folder, f"randomurl_clustered_{timestamp}.csv")
-        if os.path.exists("output_ai_tagged.csv"):
-            os.replace("output_ai_tagged.csv", clustered_csv)
-            success(f"Clustered CSV saved to {clustered_csv}")
-        else:
-            error("Expected clustered file 'output_ai_tagged.csv' not found after clustering.")
-            raise typer.Exit(code=1)
-
-        success(f"AI insights JSON saved to {ai_insights_json}")
-
-        # STEP 5: Cohere cluster summaries
-        cluster_descriptions_json = os.path.join(folder, f"randomurl_cluster_descriptions_{timestamp}.json")
-        describe_clusters(clustered_csv, cluster_descriptions_json, top_n=top_n, model=model)
-        success(f"Cluster descriptions saved to {cluster_descriptions_json}")
-
-        success("[PHASE 6.2] Randomurl full pipeline completed successfully! 🎯🚀")
-
+        fields = dict(f.split("=", 1) for f in field or [])
+    except ValueError:
+        error("--field must look like name=selector")
+        raise typer.Exit(code=2)
+    try:
+        with profiling("randomurl_runs", enabled=profile):
+            run_randomurl(url, selector, pagination_selector, max_pages, sim_threshold, clusters, top_n, model,
+                          incremental=incremental, state_dir=state_dir, use_cache=cache,
+                          explain=explain, rerun_from=rerun_from, fmt=fmt, fields=fields,
+                          key_fields=key_field or None, scrape_max_age=scrape_max_age)
     except Exception as e:
         error(f"Randomurl pipeline failed: {e}")
         raise typer.Exit(code=1)
@@ -0,0 +1,33 @@
+import os
+import threading
+
+from dotenv import load_dotenv
+
+_client = None
+_lock = threading.Lock()
+
+
+def get_cohere_client():
+    """
+    Process-wide Cohere client built from $COHERE_API_KEY (.env is loaded first).
+    $COHERE_BASE_URL (or the SDK's own $CO_API_URL) points it at another
+    endpoint, e.g. the offline benchmark stand-in.
+    """
+    global _client
+    with _lock:
+        if _client is None:
+            import cohere
+
+            load_dotenv()
+            api_key = os.getenv("COHERE_API_KEY")
+            if not api_key:
+                raise RuntimeError("COHERE_API_KEY not found in environment variables!")
+            _client = cohere.Client(api_key, base_url=os.getenv("COHERE_BASE_URL", os.getenv("CO_API_URL")))
+        return _client
+
+
+def reset_cohere_client():
+    """Drop the cached client so the next get_cohere_client() reads the environment again."""
+    global _client
+    with _lock:
+        _client = None
@@ -1,11 +1,170 @@
+import atexit
+import datetime
+import json
+import logging
+import os
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
+
 from rich.console import Console
+
 console = Console()
 
-def info(msg: str):
-    console.print(f"[INFO] {msg}", style="bold cyan")
+# Defaults, overridable from the environment or configure()
+LEVEL_ENV = "AUTOSCRAPER_LOG_LEVEL"
+FILE_ENV = "AUTOSCRAPER_LOG_FILE"
+
+SUCCESS = 25
+logging.addLevelName(SUCCESS, "SUCCESS")
+
+_STYLES = {
+    logging.DEBUG: "dim",
+    logging.INFO: "bold cyan",
+    SUCCESS: "bold green",
+    logging.WARNING: "bold yellow",
+    logging.ERROR: "bold red",
+}
+
+_logger = logging.getLogger("autoscraper")
+_logger.propagate = False
+_queue = queue.Queue()
+_listener = None
+_handlers = []
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Pass at most `burst` records per message template every `window` seconds.
+    Dropped records are counted and reported on the next record that gets through.
+    """
+
+    def __init__(self, burst: int = 20, window: float = 5.0, max_keys: int = 1000):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.max_keys = max_keys
+        self._seen = {}
+
+    def filter(self, record):
+        key = (record.levelno, getattr(record, "template", record.msg))
+        now = time.monotonic()
+        state = self._seen.get(key)
+        if state is None or now - state[0] >= self.window:
+            if len(self._seen) >= self.max_keys:
+                self._seen.clear()
+            record.suppressed = state[2] if state else 0
+            self._seen[key] = [now, 1, 0]
+            return True
+        if state[1] < self.burst:
+            state[1] += 1
+            record.suppressed = 0
+            return True
+        state[2] += 1
+        return False
+
+
+class RichConsoleHandler(logging.Handler):
+    """Human-readable `[LEVEL] message` lines, colored by level."""
+
+    def emit(self, record):
+        try:
+            msg = record.getMessage()
+            suppressed = getattr(record, "suppressed", 0)
+            if suppressed:
+                msg += f" (+{suppressed} similar suppressed)"
+            console.print(f"[{record.levelname}] {msg}", style=_STYLES.get(record.levelno, ""),
+                          markup=False, highlight=False)
+        except Exception:
+            self.handleError(record)
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record; keyword fields passed to info()/error()/... are merged in."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "msg": record.getMessage(),
+            "module": record.module,
+            "func": record.funcName,
+            "thread": record.threadName,
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(QueueHandler):
+    def prepare(self, record):
+        # keep the unformatted template so repeats can be rate-limited by it
+        template = record.msg
+        record = super().prepare(record)
+        record.template = template
+        return record
+
+
+def configure(level: str = None, json_path: str = None, burst: int = 20, window: float = 5.0):
+    """
+    (Re)build the logging pipeline: callers only enqueue records; a background
+    listener renders them to the console (rate-limited per message template)
+    and, when `json_path` is set, appends them as JSON lines.
+    Defaults come from $AUTOSCRAPER_LOG_LEVEL and $AUTOSCRAPER_LOG_FILE.
+    """
+    global _listener, _handlers
+    if _listener is not None:
+        _listener.stop()
+        for handler in _handlers:
+            handler.close()
+
+    level = (level or os.getenv(LEVEL_ENV) or "INFO").upper()
+    json_path = json_path or os.getenv(FILE_ENV)
+
+    console_handler = RichConsoleHandler()
+    console_handler.addFilter(RateLimitFilter(burst, window))
+    _handlers = [console_handler]
+    if json_path:
+        os.makedirs(os.path.dirname(json_path) or ".", exist_ok=True)
+        file_handler = logging.FileHandler(json_path, encoding="utf-8")
+        file_handler.setFormatter(JsonLinesFormatter())
+        _handlers.append(file_handler)
+
+    _logger.handlers = [_QueueHandler(_queue)]
+    _logger.setLevel(level if isinstance(logging.getLevelName(level), int) else logging.INFO)
+    _listener = QueueListener(_queue, *_handlers)
+    _listener.start()
+
+
+def flush():
+    """Block until every queued record has been rendered."""
+    _queue.join()
+
+
+def _shutdown():
+    if _listener is not None:
+        _listener.stop()
+        for handler in _handlers:
+            handler.close()
+
+
+atexit.register(_shutdown)
+configure()
+
+
+# Messages are %-style templates: `info("Fetching %s (attempt %d)", url, attempt)`.
+# Arguments are only formatted when the level is enabled. Extra keyword
+# arguments become fields of the JSON line.
+def debug(msg: str, *args, **fields):
+    _logger.log(logging.DEBUG, msg, *args, stacklevel=2, extra={"fields": fields})
+
+def info(msg: str, *args, **fields):
+    _logger.log(logging.INFO, msg, *args, stacklevel=2, extra={"fields": fields})
+
+def success(msg: str, *args, **fields):
+    _logger.log(SUCCESS, msg, *args, stacklevel=2, extra={"fields": fields})
 
-def success(msg: str):
-    console.print(f"[SUCCESS] {msg}", style="bold green")
+def warning(msg: str, *args, **fields):
+    _logger.log(logging.WARNING, msg, *args, stacklevel=2, extra={"fields": fields})
 
-def error(msg: str):
-    console.print(f"[ERROR] {msg}", style="bold red")
+def error(msg: str, *args, **fields):
+    _logger.log(logging.ERROR, msg, *args, stacklevel=2, extra={"fields": fields})
@@ -0,0 +1,386 @@
+import bisect
+import contextlib
+import copy
+import cProfile
+import datetime
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from urllib.parse import urlparse
+
+from autoscraper.utils.logger import info
+
+# Set to a file path (e.g. inside node_exporter's textfile directory) to also
+# export every run report in the Prometheus text format.
+PROM_TEXTFILE_ENV = "AUTOSCRAPER_PROM_TEXTFILE"
+
+# seconds; the last bucket is +Inf
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float("inf"))
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram (per-bucket counts, not cumulative).
+    `max` is None for the difference of two histograms: the exact maximum of
+    an interval can't be recovered from running totals.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def minus(self, other: "Histogram") -> "Histogram":
+        diff = Histogram(self.buckets)
+        diff.counts = [a - b for a, b in zip(self.counts, other.counts)]
+        diff.count = self.count - other.count
+        diff.sum = self.sum - other.sum
+        diff.max = None
+        return diff
+
+    def _top(self) -> float:
+        # exact max when known, else the highest finite bound of a non-empty bucket
+        if self.max is not None:
+            return self.max
+        for i in range(len(self.counts) - 1, -1, -1):
+            if self.counts[i]:
+                bound = self.buckets[i]
+                return bound if bound != float("inf") else (self.buckets[i - 1] if i else 0.0)
+        return 0.0
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside the bucket that holds it."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lo = self.buckets[i - 1] if i else 0.0
+                hi = min(self.buckets[i], self._top())
+                return lo + (hi - lo) * (rank - seen) / n if hi > lo else hi
+            seen += n
+        return self._top()
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": round(self.sum / self.count, 4) if self.count else 0.0,
+            "p50": round(self.quantile(0.5), 4),
+            "p90": round(self.quantile(0.9), 4),
+            "p99": round(self.quantile(0.99), 4),
+            "max": round(self.max, 4) if self.max is not None else None,
+        }
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process, or None where `resource` is unavailable."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _labels(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Metrics:
+    """
+    Thread-safe counters and histograms keyed by (name, labels).
+    Counters only grow, so a run report is the difference between two snapshots.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram()
+            hist.observe(value)
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """Record wall and process CPU time of a pipeline stage."""
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.inc("stage_wall_seconds_total", time.perf_counter() - wall, stage=name)
+            self.inc("stage_cpu_seconds_total", time.process_time() - cpu, stage=name)
+            self.inc("stage_runs_total", stage=name)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "at": time.time(),
+                "counters": dict(self.counters),
+                "histograms": copy.deepcopy(self.histograms),
+            }
+
+    def delta(self, since: dict = None):
+        """(counters, histograms) accumulated after `since` (everything when None)."""
+        now = self.snapshot()
+        if since is None:
+            return now["counters"], now["histograms"]
+        counters = {k: v - since["counters"].get(k, 0) for k, v in now["counters"].items()}
+        histograms = {k: (h.minus(since["histograms"][k]) if k in since["histograms"] else h)
+                      for k, h in now["histograms"].items()}
+        return ({k: v for k, v in counters.items() if v},
+                {k: h for k, h in histograms.items() if h.count})
+
+    def report(self, since: dict = None) -> dict:
+        """Structured run report: stages, fetches, caches, embeddings, LLM calls, memory."""
+        counters, histograms = self.delta(since)
+
+        def by(name, label):
+            out = {}
+            for (n, labels), v in counters.items():
+                if n == name:
+                    key = dict(labels).get(label, "")
+                    out[key] = out.get(key, 0) + v
+            return out
+
+        def merged(name, **match):
+            total = Histogram()
+            for (n, labels), h in histograms.items():
+                if n == name and all(dict(labels).get(k) == v for k, v in match.items()):
+                    total.counts = [a + b for a, b in zip(total.counts, h.counts)]
+                    total.count += h.count
+                    total.sum += h.sum
+                    total.max = None if total.max is None or h.max is None else max(total.max, h.max)
+            return total.summary()
+
+        wall, cpu, runs = (by(n, "stage") for n in
+                           ("stage_wall_seconds_total", "stage_cpu_seconds_total", "stage_runs_total"))
+        stages = {s: {"runs": int(runs.get(s, 0)), "wall_s": round(wall[s], 3), "cpu_s": round(cpu.get(s, 0), 3)}
+                  for s in wall}
+
+        hosts = {}
+        for host, n in by("fetch_requests_total", "host").items():
+            hosts[host] = {
+                "requests": int(n),
+                "bytes": int(by("fetch_bytes_total", "host").get(host, 0)),
+                "retries": int(by("fetch_retries_total", "host").get(host, 0)),
+                "latency_s": merged("fetch_latency_seconds", host=host),
+            }
+        fetch = {
+            "requests": int(sum(by("fetch_requests_total", "host").values())),
+            "by_status": {k: int(v) for k, v in by("fetch_requests_total", "status").items()},
+            "bytes": int(sum(by("fetch_bytes_total", "host").values())),
+            "retries": int(sum(by("fetch_retries_total", "host").values())),
+            "latency_s": merged("fetch_latency_seconds"),
+            "hosts": hosts,
+        }
+
+        caches = {}
+        for (n, labels), v in counters.items():
+            if n == "cache_requests_total":
+                labels = dict(labels)
+                entry = caches.setdefault(labels["cache"], {"hits": 0, "misses": 0})
+                entry["hits" if labels["result"] == "hit" else "misses"] += int(v)
+        for entry in caches.values():
+            entry["hit_rate"] = round(entry["hits"] / (entry["hits"] + entry["misses"]), 3)
+
+        emb_rows, emb_secs = by("embedding_rows_total", "model"), by("embedding_seconds_total", "model")
+        embeddings = {m: {"rows": int(r), "seconds": round(emb_secs.get(m, 0), 3),
+                          "rows_per_s": round(r / emb_secs[m], 1) if emb_secs.get(m) else None}
+                      for m, r in emb_rows.items()}
+
+        llm = {}
+        for model, n in by("llm_calls_total", "model").items():
+            tokens = {}
+            for (name, labels), v in counters.items():
+                labels = dict(labels)
+                if name == "llm_tokens_total" and labels.get("model") == model:
+                    tokens[labels["kind"]] = tokens.get(labels["kind"], 0) + int(v)
+            llm[model] = {
+                "calls": int(n),
+                "errors": int(by("llm_errors_total", "model").get(model, 0)),
+                "input_tokens": tokens.get("input", 0),
+                "output_tokens": tokens.get("output", 0),
+                "latency_s": merged("llm_latency_seconds", model=model),
+            }
+
+        rss = peak_rss_bytes()
+        started = since["at"] if since else None
+        return {
+            "generated_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "elapsed_s": round(time.time() - started, 3) if started else None,
+            "peak_rss_mb": round(rss / 2 ** 20, 1) if rss else None,
+            "stages": stages,
+            "fetch": fetch,
+            "cache": caches,
+            "embeddings": embeddings,
+            "llm": llm,
+        }
+
+    def to_prometheus(self, since: dict = None, prefix: str = "autoscraper_") -> str:
+        """Prometheus text exposition of counters, histograms and peak RSS."""
+        counters, histograms = self.delta(since)
+
+        def fmt_labels(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+        lines = []
+        for name in sorted({n for n, _ in counters}):
+            lines.append(f"# TYPE {prefix}{name} counter")
+            for (n, labels), v in sorted(counters.items()):
+                if n == name:
+                    lines.append(f"{prefix}{name}{fmt_labels(labels)} {v:g}")
+        for name in sorted({n for n, _ in histograms}):
+            lines.append(f"# TYPE {prefix}{name} histogram")
+            for (n, labels), h in sorted(histograms.items(), key=lambda kv: kv[0]):
+                if n != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(h.buckets, h.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    lines.append(f"{prefix}{name}_bucket{fmt_labels(labels, [('le', le)])} {cumulative}")
+                lines.append(f"{prefix}{name}_sum{fmt_labels(labels)} {h.sum:g}")
+                lines.append(f"{prefix}{name}_count{fmt_labels(labels)} {h.count}")
+        rss = peak_rss_bytes()
+        if rss:
+            lines.append(f"# TYPE {prefix}peak_rss_bytes gauge")
+            lines.append(f"{prefix}peak_rss_bytes {rss}")
+        return "\n".join(lines) + "\n"
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """Process-wide metrics registry."""
+    return _metrics
+
+
+def record_fetch(url: str, status, seconds: float, nbytes: int = 0):
+    """One HTTP (or browser) request attempt; status is the code or "error"."""
+    host = urlparse(url).netloc
+    _metrics.inc("fetch_requests_total", host=host, status=status)
+    _metrics.observe("fetch_latency_seconds", seconds, host=host)
+    if nbytes:
+        _metrics.inc("fetch_bytes_total", nbytes, host=host)
+
+
+def record_cache(cache: str, hit: bool, n: int = 1):
+    _metrics.inc("cache_requests_total", n, cache=cache, result="hit" if hit else "miss")
+
+
+def record_embedding(model: str, rows: int, seconds: float):
+    _metrics.inc("embedding_rows_total", rows, model=model)
+    _metrics.inc("embedding_seconds_total", seconds, model=model)
+
+
+def llm_call(fn, op: str, **kwargs):
+    """
+    Call a Cohere client method (co.chat, co.generate, co.embed, ...) with
+    `kwargs`, recording latency, errors and billed tokens per model.
+    """
+    model = kwargs.get("model", "default")
+    start = time.perf_counter()
+    try:
+        response = fn(**kwargs)
+    except Exception:
+        _metrics.inc("llm_errors_total", model=model, op=op)
+        raise
+    finally:
+        _metrics.observe("llm_latency_seconds", time.perf_counter() - start, model=model, op=op)
+        _metrics.inc("llm_calls_total", model=model, op=op)
+    billed = getattr(getattr(response, "meta", None), "billed_units", None)
+    for kind in ("input", "output"):
+        tokens = getattr(billed, f"{kind}_tokens", None)
+        if tokens:
+            _metrics.inc("llm_tokens_total", tokens, model=model, kind=kind)
+    return response
+
+
+def _atomic_write(path: str, text: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def export_prometheus():
+    """Write the process totals to $AUTOSCRAPER_PROM_TEXTFILE, if set."""
+    prom_path = os.getenv(PROM_TEXTFILE_ENV)
+    if prom_path:
+        _atomic_write(prom_path, _metrics.to_prometheus())
+
+
+def export_run(report_path: str, since: dict = None) -> dict:
+    """
+    Write the JSON report of everything recorded after `since` to `report_path`
+    and refresh the Prometheus textfile.
+    """
+    report = _metrics.report(since)
+    _atomic_write(report_path, json.dumps(report, indent=2, ensure_ascii=False))
+    export_prometheus()
+    return report
+
+
+@contextlib.contextmanager
+def profiling(output_dir: str, enabled: bool = True, top: int = 30):
+    """
+    Run the body under cProfile and tracemalloc, then write
+    profile_<stamp>.pstats (for snakeviz/pstats), a cumulative-time summary
+    and the top allocation sites to `output_dir`.
+    """
+    if not enabled:
+        yield
+        return
+    tracemalloc.start(25)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        os.makedirs(output_dir, exist_ok=True)
+        stem = os.path.join(output_dir, "profile_" + datetime.datetime.now().strftime("%Y%m%d_%H%M%S"))
+        profiler.dump_stats(f"{stem}.pstats")
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+        out.write(f"\nPython heap: current {current / 2 ** 20:.1f} MiB, peak {peak / 2 ** 20:.1f} MiB\n")
+        out.write(f"Top {top} allocation sites:\n")
+        for stat in snapshot.statistics("lineno")[:top]:
+            out.write(f"  {stat}\n")
+        with open(f"{stem}.txt", "w", encoding="utf-8") as f:
+            f.write(out.getvalue())
+        info("Profile saved to %s.pstats and %s.txt", stem, stem)
@@ -0,0 +1,100 @@
+import csv
+import json
+import os
+import random
+import tempfile
+import time
+
+import typer
+
+from autoscraper.core.storage import FORMATS, read_table, write_table
+
+app = typer.Typer(help="Write/read time and file size of each output format")
+
+_WORDS = ("array graph query modulo prefix sum tree greedy binary search input output "
+          "integer string print each line constraint sample answer minimum maximum").split()
+
+
+def make_rows(n: int, text_words: int = 300, seed: int = 42) -> list:
+    """Synthetic problem rows: short fields, two long text columns and a list column."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        rows.append({
+            "task_id": f"abc{i // 6:03d}_{'abcdef'[i % 6]}",
+            "name": " ".join(rng.choices(_WORDS, k=4)),
+            "statement": " ".join(rng.choices(_WORDS, k=text_words)),
+            "teaching_version": " ".join(rng.choices(_WORDS, k=text_words * 2)),
+            "cluster": rng.randrange(5),
+            "predicted_categories": rng.sample(["life", "truth", "love", "graph", "dp"], k=rng.randrange(4)),
+        })
+    return rows
+
+
+def _legacy_csv(rows, path):
+    # what cli.py run_config did before the shared output layer
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+
+
+def _legacy_json(rows, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(rows, f, indent=2, ensure_ascii=False)
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def run(rows_count: int = 20000, text_words: int = 300, repeat: int = 3) -> list:
+    rows = make_rows(rows_count, text_words)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = [("legacy csv.DictWriter", os.path.join(tmp, "legacy.csv"), _legacy_csv),
+                 ("legacy json indent=2", os.path.join(tmp, "legacy.json"), _legacy_json)]
+        cases += [(fmt, os.path.join(tmp, "out" + ext), write_table) for fmt, ext in FORMATS.items()]
+        for label, path, writer in cases:
+            try:
+                write_s = min(_timed(writer, rows, path)[0] for _ in range(repeat))
+                read_s = min(_timed(read_table, path)[0] for _ in range(repeat))
+            except RuntimeError as e:
+                results.append({"format": label, "error": str(e)})
+                continue
+            results.append({
+                "format": label,
+                "rows": rows_count,
+                "write_s": round(write_s, 4),
+                "read_s": round(read_s, 4),
+                "size_bytes": os.path.getsize(path),
+            })
+    return results
+
+
+@app.command()
+def main(
+    rows: int = typer.Option(20000, help="Rows to generate"),
+    text_words: int = typer.Option(300, help="Words in each long text column"),
+    repeat: int = typer.Option(3, help="Best-of-N timing"),
+    output: str = typer.Option(None, help="Write results as JSON here"),
+):
+    results = run(rows, text_words, repeat)
+    base = next(r["size_bytes"] for r in results if r["format"] == "legacy csv.DictWriter")
+    print(f"{'format':<24}{'write s':>10}{'read s':>10}{'size MB':>10}{'vs csv':>8}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['format']:<24}  skipped: {r['error']}")
+            continue
+        print(f"{r['format']:<24}{r['write_s']:>10.3f}{r['read_s']:>10.3f}"
+              f"{r['size_bytes'] / 1e6:>10.2f}{r['size_bytes'] / base:>8.2f}")
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    app()
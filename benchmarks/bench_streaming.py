@@ -0,0 +1,80 @@
+import json
+import subprocess
+import sys
+import time
+
+import typer
+
+from autoscraper.utils.metrics import peak_rss_bytes
+from benchmarks.fixtures import FixtureSite
+
+app = typer.Typer(help="Peak memory and latency of buffered vs streaming page parsing")
+
+# mode -> extra scrape_with_pagination arguments ({limit} is filled from --item-limit)
+MODES = {
+    "buffered": {},
+    "stream": {"stream": True},
+    "item_limit": {"item_limit": "{limit}"},
+}
+
+
+def _peak_rss_mb() -> float:
+    return peak_rss_bytes() / (1024 * 1024)
+
+
+@app.command(hidden=True)
+def worker(mode: str, url: str, pages: int, item_limit: int):
+    """Run one mode in a fresh process and print its timing and RSS growth as JSON."""
+    from autoscraper.core.scraper import scrape_with_pagination
+    from autoscraper.core.throttle import HostScheduler
+    from autoscraper.utils.logger import configure
+
+    configure(level="WARNING")
+    sched = HostScheduler(initial_rate=1e6, max_rate=1e6, burst=1e6, respect_robots=False)
+    kwargs = {k: (item_limit if v == "{limit}" else v) for k, v in MODES[mode].items()}
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    rows = scrape_with_pagination(url, {"data": FixtureSite.text_selector}, FixtureSite.pagination_selector,
+                                  max_pages=pages, scheduler=sched, **kwargs)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"mode": mode, "rows": len(rows), "seconds": round(elapsed, 4),
+                      "peak_rss_mb": round(_peak_rss_mb() - baseline, 1)}))
+
+
+def run(pages: int = 3, items: int = 20000, item_limit: int = 100, repeat: int = 3) -> list:
+    """Best-of-`repeat` for each mode, every run in its own process so peak RSS is not shared."""
+    results = []
+    with FixtureSite(pages=pages, items=items, pager_first=True) as site:
+        page_mb = len(site.page(1)) / 1e6
+        for mode in MODES:
+            runs = []
+            for _ in range(repeat):
+                out = subprocess.run([sys.executable, "-m", "benchmarks.bench_streaming", "worker", mode,
+                                      site.url, str(pages), str(item_limit)],
+                                     capture_output=True, text=True, check=True)
+                runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+            results.append({"mode": mode, "rows": runs[0]["rows"], "page_mb": round(page_mb, 2),
+                            "seconds": min(r["seconds"] for r in runs),
+                            "peak_rss_mb": min(r["peak_rss_mb"] for r in runs)})
+    return results
+
+
+@app.command()
+def main(
+    pages: int = typer.Option(3, help="Pages to follow"),
+    items: int = typer.Option(20000, help="Quotes per page (20000 is about 8 MB of HTML)"),
+    item_limit: int = typer.Option(100, help="Per-page item limit of the item_limit mode"),
+    repeat: int = typer.Option(3, help="Best-of-N"),
+    output: str = typer.Option(None, help="Write results as JSON here"),
+):
+    results = run(pages, items, item_limit, repeat)
+    print(f"{'mode':<14}{'rows':>8}{'page MB':>9}{'seconds':>10}{'peak RSS MB':>13}")
+    for r in results:
+        print(f"{r['mode']:<14}{r['rows']:>8}{r['page_mb']:>9.2f}{r['seconds']:>10.3f}{r['peak_rss_mb']:>13.1f}")
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,216 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+_WORDS = ("life truth love friend world change mind dream heart time people fear hope simple "
+          "happiness success failure reason believe nothing always never courage wisdom").split()
+_AUTHORS = ("Albert Einstein", "Jane Austen", "Mark Twain", "Marilyn Monroe", "Andre Gide", "Thomas Edison")
+
+
+def make_quotes(page: int, items: int, words: int = 20, duplicate_rate: float = 0.1, seed: int = 7) -> list:
+    """Deterministic quote texts for one page; a share of them repeat earlier pages (for dedup work)."""
+    quotes = []
+    for i in range(items):
+        rng = random.Random(f"{seed}:{page}:{i}")
+        if page > 1 and rng.random() < duplicate_rate:
+            rng = random.Random(f"{seed}:{rng.randrange(1, page)}:{i}")
+        text = " ".join(rng.choices(_WORDS, k=words)).capitalize() + "."
+        quotes.append((text, rng.choice(_AUTHORS), rng.sample(_WORDS, k=3)))
+    return quotes
+
+
+def _page_html(n: int, pages: int, items: int, words: int, pager_first: bool = False) -> bytes:
+    pager = f'<nav><ul class="pager"><li class="next"><a href="/page/{n + 1}/">Next</a></li></ul></nav>'
+    parts = ["<html><head><title>Fixture quotes</title></head><body><div class=\"col-md-8\">"]
+    if n < pages and pager_first:
+        parts.append(pager)
+    for text, author, tags in make_quotes(n, items, words):
+        tag_links = "".join(f'<a class="tag" href="/tag/{t}/">{t}</a>' for t in tags)
+        parts.append(f'<div class="quote"><span class="text">{text}</span>'
+                     f'<span>by <small class="author">{author}</small></span>'
+                     f'<div class="tags">{tag_links}</div></div>')
+    if n < pages and not pager_first:
+        parts.append(pager)
+    parts.append("</div></body></html>")
+    return "".join(parts).encode("utf-8")
+
+
+class _Server:
+    """Threaded HTTP server on a free localhost port, usable as a context manager."""
+
+    handler = None
+
+    def start(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler)
+        self.server.fixture = self
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _SiteHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        site = self.server.fixture
+        match = re.fullmatch(r"/page/(\d+)/?", self.path)
+        if self.path == "/robots.txt":
+            body, status = b"User-agent: *\nAllow: /\n", 200
+        elif match and 1 <= int(match.group(1)) <= site.pages:
+            body, status = site.page(int(match.group(1))), 200
+        else:
+            body, status = b"not found", 404
+        if site.latency:
+            time.sleep(site.latency)
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # streaming clients may hang up once they have what they need
+            self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+class FixtureSite(_Server):
+    """
+    Synthetic paginated quotes site (quotes.toscrape.com layout):
+    /page/1/ .. /page/<pages>/, each with `items` div.quote entries and an li.next a link.
+    Every response is delayed by `latency` seconds; `pager_first` puts the
+    next link above the quotes instead of below them.
+    """
+
+    handler = _SiteHandler
+    text_selector = ".quote .text"
+    pagination_selector = "li.next a"
+
+    def __init__(self, pages: int = 5, items: int = 20, latency: float = 0.0, words: int = 20,
+                 pager_first: bool = False):
+        self.pages = pages
+        self.items = items
+        self.latency = latency
+        self.words = words
+        self.pager_first = pager_first
+        self._cache = {}
+
+    def page(self, n: int) -> bytes:
+        if n not in self._cache:
+            self._cache[n] = _page_html(n, self.pages, self.items, self.words, self.pager_first)
+        return self._cache[n]
+
+    @property
+    def url(self) -> str:
+        return f"{self.base_url}/page/1/"
+
+
+def _tokens(text: str) -> int:
+    return len(str(text).split())
+
+
+def fake_embedding(text: str, dim: int) -> list:
+    """Deterministic unit vector per text."""
+    seed = int.from_bytes(hashlib.blake2b(str(text).encode("utf-8"), digest_size=8).digest(), "big")
+    vec = np.random.default_rng(seed).standard_normal(dim)
+    return (vec / np.linalg.norm(vec)).round(6).tolist()
+
+
+class _CohereHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        fake = self.server.fixture
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            request = {}
+        endpoint = self.path.split("?")[0].rstrip("/").rsplit("/", 1)[-1]
+        handler = {"generate": fake.generate, "chat": fake.chat, "embed": fake.embed}.get(endpoint)
+        if handler is None:
+            self._send(404, {"message": f"unknown endpoint {self.path}"})
+            return
+        with fake.lock:
+            fake.calls[endpoint] = fake.calls.get(endpoint, 0) + 1
+        if fake.latency:
+            time.sleep(fake.latency)
+        self._send(200, handler(request))
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeCohere(_Server):
+    """
+    Local stand-in for Cohere's v1 generate, chat and embed endpoints with
+    deterministic responses, billed-token metadata and a fixed per-call latency.
+    Point the clients at it with COHERE_BASE_URL=<base_url>.
+    """
+
+    handler = _CohereHandler
+
+    def __init__(self, latency: float = 0.0, dim: int = 384):
+        self.latency = latency
+        self.dim = dim
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _meta(prompt, text):
+        return {"api_version": {"version": "1"},
+                "billed_units": {"input_tokens": _tokens(prompt), "output_tokens": _tokens(text)}}
+
+    def _answer(self, prompt: str) -> str:
+        words = re.findall(r"[a-z]+", str(prompt).lower())
+        common = sorted(set(words), key=lambda w: (-words.count(w), w))[:5]
+        return ("These items share a theme around " + ", ".join(common) +
+                ". They are short reflective statements. The tone is motivational.")
+
+    def generate(self, request):
+        text = self._answer(request.get("prompt", ""))
+        return {"id": "fake-generate", "prompt": request.get("prompt"),
+                "generations": [{"id": "fake-generation", "text": text, "finish_reason": "COMPLETE"}],
+                "meta": self._meta(request.get("prompt", ""), text)}
+
+    def chat(self, request):
+        text = self._answer(request.get("message", ""))
+        return {"response_id": "fake-chat", "generation_id": "fake-generation", "text": text,
+                "finish_reason": "COMPLETE", "chat_history": [],
+                "meta": self._meta(request.get("message", ""), text)}
+
+    def embed(self, request):
+        texts = request.get("texts") or []
+        return {"id": "fake-embed", "response_type": "embeddings_floats", "texts": texts,
+                "embeddings": [fake_embedding(t, self.dim) for t in texts],
+                "meta": {"api_version": {"version": "1"},
+                         "billed_units": {"input_tokens": sum(_tokens(t) for t in texts)}}}
@@ -0,0 +1,279 @@
+import datetime
+import importlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import typer
+
+from benchmarks.fixtures import FixtureSite, FakeCohere, make_quotes
+
+app = typer.Typer(help="Offline benchmarks against local fixture sites and a fake Cohere endpoint")
+
+# pages x items per page, plus per-response latency of the fixture site (seconds)
+SCALES = {
+    "small": {"pages": 5, "items": 20, "latency": 0.0},
+    "medium": {"pages": 20, "items": 50, "latency": 0.002},
+    "large": {"pages": 50, "items": 200, "latency": 0.005},
+}
+
+
+class BenchContext:
+    """Per-scale fixtures and input tables shared by the benchmarks."""
+
+    def __init__(self, scale: str, site: FixtureSite, workdir: str):
+        from autoscraper.core.storage import write_table
+
+        self.scale = scale
+        self.site = site
+        self.workdir = workdir
+        self.rows = site.pages * site.items
+        texts = [text for page in range(1, site.pages + 1) for text, _, _ in make_quotes(page, site.items, site.words)]
+        self.raw_csv = os.path.join(workdir, "raw.csv")
+        write_table([{"data": t} for t in texts], self.raw_csv)
+        self.clustered_csv = os.path.join(workdir, "clustered.csv")
+        write_table([{"data": t, "ai_cluster": i % 5} for i, t in enumerate(texts)], self.clustered_csv)
+        self._runs = 0
+
+    def out(self, name: str) -> str:
+        self._runs += 1
+        return os.path.join(self.workdir, f"{self._runs:03d}_{name}")
+
+
+def _scrape(ctx, scrape_with_pagination):
+    rows = scrape_with_pagination(ctx.site.url, {"data": FixtureSite.text_selector},
+                                  FixtureSite.pagination_selector, max_pages=ctx.site.pages)
+    assert len(rows) == ctx.rows, f"expected {ctx.rows} rows, scraped {len(rows)}"
+    return len(rows)
+
+
+def _eda(ctx, run_eda):
+    run_eda(ctx.raw_csv, ctx.out("cleaned.csv"), ctx.out("insights.json"))
+    return ctx.rows
+
+
+def _enrich(ctx, semantic_enrich):
+    semantic_enrich(ctx.raw_csv, ctx.out("enriched.csv"), 0.9)
+    return ctx.rows
+
+
+def _cluster(ctx, run_ai_insights):
+    run_ai_insights(ctx.raw_csv, ctx.out("ai_insights.json"), 5, output_csv=ctx.out("ai_tagged.csv"))
+    return ctx.rows
+
+
+def _describe(ctx, describe_clusters):
+    describe_clusters(ctx.clustered_csv, ctx.out("cluster_descriptions.json"), top_n=5)
+    return ctx.rows
+
+
+def _randomurl(ctx, run_randomurl):
+    run_randomurl(ctx.site.url, FixtureSite.text_selector, FixtureSite.pagination_selector,
+                  max_pages=ctx.site.pages, folder=ctx.out("randomurl"), use_cache=False)
+    return ctx.rows
+
+
+# name -> (module, function, driver); the module is imported lazily so a
+# missing optional dependency skips that benchmark instead of the whole run
+BENCHMARKS = {
+    "scrape_with_pagination": ("autoscraper.core.scraper", "scrape_with_pagination", _scrape),
+    "run_eda": ("autoscraper.core.eda", "run_eda", _eda),
+    "semantic_enrich": ("autoscraper.core.enricher", "semantic_enrich", _enrich),
+    "run_ai_insights": ("autoscraper.core.ai_insights", "run_ai_insights", _cluster),
+    "describe_clusters": ("autoscraper.core.gpt_cluster_describer", "describe_clusters", _describe),
+    "randomurl": ("autoscraper.randomurl_cli", "run_randomurl", _randomurl),
+}
+
+
+def git_commit() -> dict:
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], capture_output=True, text=True, timeout=10).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return ""
+    return {"commit": git("rev-parse", "--short", "HEAD") or "unknown",
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def run_one(name: str, ctx: BenchContext, repeat: int, warmup: bool) -> dict:
+    module_name, func_name, driver = BENCHMARKS[name]
+    result = {"benchmark": name, "scale": ctx.scale, "rows": ctx.rows}
+    try:
+        func = getattr(importlib.import_module(module_name), func_name)
+    except Exception as e:
+        return {**result, "status": "skipped", "reason": f"{type(e).__name__}: {e}"}
+    times = []
+    try:
+        if warmup:
+            driver(ctx, func)
+        for _ in range(repeat):
+            start = time.perf_counter()
+            driver(ctx, func)
+            times.append(time.perf_counter() - start)
+    except Exception as e:
+        return {**result, "status": "failed", "reason": f"{type(e).__name__}: {e}"}
+    best = min(times)
+    return {**result, "status": "ok", "times_s": [round(t, 4) for t in times], "best_s": round(best, 4),
+            "median_s": round(statistics.median(times), 4), "rows_per_s": round(ctx.rows / best, 1)}
+
+
+def _run_scales(scales, names, repeat, warmup, llm_latency):
+    from autoscraper.utils.logger import flush
+
+    results = []
+    env_keys = ("COHERE_BASE_URL", "COHERE_API_KEY", "HF_HUB_OFFLINE")
+    saved_env = {key: os.environ.get(key) for key in env_keys}
+    with FakeCohere(latency=llm_latency) as cohere, tempfile.TemporaryDirectory() as tmp:
+        try:
+            # read when the client modules are imported
+            os.environ["COHERE_BASE_URL"] = cohere.base_url
+            os.environ.setdefault("COHERE_API_KEY", "offline-benchmark")
+            # embedding models must already be in the local Hugging Face cache
+            os.environ.setdefault("HF_HUB_OFFLINE", "1")
+            for scale in scales:
+                with FixtureSite(**SCALES[scale]) as site:
+                    workdir = os.path.join(tmp, scale)
+                    os.makedirs(workdir)
+                    ctx = BenchContext(scale, site, workdir)
+                    for name in names:
+                        result = run_one(name, ctx, repeat, warmup)
+                        flush()
+                        results.append(result)
+                        status = (f"best {result['best_s']:.3f}s, {result['rows_per_s']:.0f} rows/s"
+                                  if result["status"] == "ok" else f"{result['status']}: {result['reason']}")
+                        typer.echo(f"{name:<24}{scale:<8}{status}")
+            return results, dict(cohere.calls)
+        finally:
+            for key, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+            # a client built during the run points at the stand-in, which is about to stop
+            client_module = sys.modules.get("autoscraper.utils.cohere_client")
+            if client_module is not None:
+                client_module.reset_cohere_client()
+
+
+def run_suite(scales: list, names: list, repeat: int = 3, warmup: bool = True,
+              llm_latency: float = 0.05, log_level: str = "WARNING") -> dict:
+    """Run every named benchmark at every scale with no network access; returns the results document."""
+    from autoscraper.utils.logger import configure as configure_logging
+    from autoscraper.core.throttle import HostScheduler, get_scheduler, set_scheduler
+
+    configure_logging(level=log_level)
+    previous_scheduler = get_scheduler()
+    # the fixture sites are local, so politeness limits would only measure the throttle
+    set_scheduler(HostScheduler(initial_rate=1e6, max_rate=1e6, burst=1e6, initial_concurrency=64,
+                                max_concurrency=64, respect_robots=False))
+    try:
+        results, llm_calls = _run_scales(scales, names, repeat, warmup, llm_latency)
+    finally:
+        set_scheduler(previous_scheduler)
+        configure_logging()
+    return {
+        "meta": {
+            **git_commit(),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "scales": {s: SCALES[s] for s in scales},
+            "llm_latency_s": llm_latency,
+            "llm_calls": llm_calls,
+        },
+        "results": results,
+    }
+
+
+def compare_results(base: dict, new: dict, threshold: float = 0.15, min_delta: float = 0.01) -> list:
+    """
+    Pair results by (benchmark, scale) and classify each on best-of-N time:
+    regression when slower by more than `threshold` (and by at least `min_delta`
+    seconds, so timer noise on tiny runs is ignored), or when a benchmark that
+    passed in `base` no longer passes.
+    """
+    base_by_key = {(r["benchmark"], r["scale"]): r for r in base["results"]}
+    rows = []
+    for r in new["results"]:
+        old = base_by_key.get((r["benchmark"], r["scale"]))
+        row = {"benchmark": r["benchmark"], "scale": r["scale"], "base_s": None, "new_s": r.get("best_s"),
+               "change": None, "verdict": "new"}
+        if old is not None:
+            row["base_s"] = old.get("best_s")
+            if old["status"] == "ok" and r["status"] == "failed":
+                row["verdict"] = "regression"
+            elif old["status"] != "ok" or r["status"] != "ok":
+                row["verdict"] = r["status"] if r["status"] != "ok" else "new"
+            else:
+                row["change"] = r["best_s"] / old["best_s"] - 1 if old["best_s"] else 0.0
+                if abs(r["best_s"] - old["best_s"]) < min_delta:
+                    row["verdict"] = "same"
+                else:
+                    row["verdict"] = ("regression" if row["change"] > threshold
+                                      else "improvement" if row["change"] < -threshold else "same")
+        rows.append(row)
+    return rows
+
+
+@app.command()
+def run(
+    scales: str = typer.Option("small,medium", help=f"Comma-separated: {', '.join(SCALES)}"),
+    only: str = typer.Option(None, help=f"Comma-separated benchmarks (default all): {', '.join(BENCHMARKS)}"),
+    repeat: int = typer.Option(3, help="Timed runs per benchmark (best and median are reported)"),
+    warmup: bool = typer.Option(True, "--warmup/--no-warmup", help="Run each benchmark once untimed first"),
+    llm_latency: float = typer.Option(0.05, help="Seconds the fake Cohere endpoint waits per call"),
+    log_level: str = typer.Option("WARNING", help="Pipeline log level while benchmarking"),
+    output: str = typer.Option(None, help="Results JSON (default: benchmark_results/<commit>.json)"),
+):
+    """Run the offline benchmark suite and write the results as JSON."""
+    scale_list = [s.strip() for s in scales.split(",") if s.strip()]
+    names = [n.strip() for n in only.split(",")] if only else list(BENCHMARKS)
+    unknown = [s for s in scale_list if s not in SCALES] + [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        typer.echo(f"Unknown scale/benchmark: {', '.join(unknown)}", err=True)
+        raise typer.Exit(code=2)
+
+    doc = run_suite(scale_list, names, repeat, warmup, llm_latency, log_level)
+    if not output:
+        suffix = "-dirty" if doc["meta"]["dirty"] else ""
+        output = os.path.join("benchmark_results", f"{doc['meta']['commit']}{suffix}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2)
+    typer.echo(f"Results saved to {output}")
+
+
+@app.command()
+def compare(
+    base_path: str = typer.Argument(..., help="Results JSON of the baseline commit"),
+    new_path: str = typer.Argument(..., help="Results JSON of the commit under test"),
+    threshold: float = typer.Option(0.15, help="Relative slowdown of best time that counts as a regression"),
+    min_delta: float = typer.Option(0.01, help="Ignore differences smaller than this many seconds"),
+):
+    """Compare two result files; exits with status 1 when any benchmark regressed."""
+    with open(base_path, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    with open(new_path, "r", encoding="utf-8") as f:
+        new = json.load(f)
+    rows = compare_results(base, new, threshold, min_delta)
+    typer.echo(f"{base['meta']['commit']} -> {new['meta']['commit']} (threshold {threshold:.0%})")
+    typer.echo(f"{'benchmark':<24}{'scale':<8}{'base s':>9}{'new s':>9}{'change':>9}  verdict")
+    for r in rows:
+        base_s = f"{r['base_s']:.3f}" if r["base_s"] is not None else "-"
+        new_s = f"{r['new_s']:.3f}" if r["new_s"] is not None else "-"
+        change = f"{r['change']:+.1%}" if r["change"] is not None else "-"
+        typer.echo(f"{r['benchmark']:<24}{r['scale']:<8}{base_s:>9}{new_s:>9}{change:>9}  {r['verdict'].upper()}")
+    regressions = [r for r in rows if r["verdict"] == "regression"]
+    if regressions:
+        typer.echo(f"{len(regressions)} regression(s) found", err=True)
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    app()
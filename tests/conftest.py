@@ -0,0 +1,44 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from autoscraper.core.throttle import HostScheduler
+
+
+class _SiteHandler(BaseHTTPRequestHandler):
+    """Three paginated pages with two .item entries each."""
+
+    def do_GET(self):
+        if not self.path.startswith("/page/"):
+            self.send_response(404)
+            self.end_headers()
+            return
+        n = int(self.path.rsplit("/", 1)[1])
+        nxt = f'<a class="next" href="/page/{n + 1}">next</a>' if n < 3 else ""
+        body = f'<p class="item">a{n}</p><p class="item">b{n}</p><a href="/page/1">home</a>{nxt}'
+        data = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_site():
+    """Base URL of a throwaway local HTTP site."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SiteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fast_scheduler():
+    """Per-host scheduler that never throttles and skips robots.txt, for local servers."""
+    return HostScheduler(initial_rate=1000, respect_robots=False)
@@ -0,0 +1,38 @@
+import json
+
+from autoscraper.core.batch import load_batch, run_batch
+
+
+def test_run_batch_writes_outputs_and_summary(local_site, tmp_path):
+    good = {"name": "site", "url": f"{local_site}/page/1", "selectors": {"item": ".item"},
+            "pagination": "a.next", "max_pages": 2}
+    (tmp_path / "good.json").write_text(json.dumps(good))
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(json.dumps(["good.json", {"name": "broken", "selectors": {}}]))
+
+    configs = load_batch(str(manifest))
+    assert [name for name, _ in configs] == ["site", "broken"]
+
+    summary = run_batch(configs, str(tmp_path / "out"), workers=2, fmt="csv")
+    by_name = {s["name"]: s for s in summary["sites"]}
+    assert by_name["site"]["rows"] == 4
+    assert by_name["broken"]["status"] == "failed"
+    assert (tmp_path / "out" / "site.csv").exists()
+    assert json.loads((tmp_path / "out" / "run_summary.json").read_text())["failed"] == 1
+
+
+def test_load_batch_sanitizes_and_dedupes_names(tmp_path):
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(json.dumps([{"name": "../x"}, {"name": "a"}, {"name": "a"}, {"name": "a_2"}, {"name": ".."}]))
+    names = [name for name, _ in load_batch(str(manifest))]
+    assert names == ["x", "a", "a_2", "a_2_2", "config_4"]
+
+
+def test_malformed_config_is_reported_not_fatal(local_site, tmp_path):
+    good = {"url": f"{local_site}/page/1", "selectors": {"item": ".item"}, "max_pages": 1}
+    (tmp_path / "a.json").write_text(json.dumps(good))
+    (tmp_path / "b.json").write_text("{bad")
+    summary = run_batch(load_batch(str(tmp_path)), str(tmp_path / "out"), workers=2)
+    by_name = {s["name"]: s for s in summary["sites"]}
+    assert by_name["a"]["status"] == "ok"
+    assert by_name["b"]["status"] == "failed" and "b.json" in by_name["b"]["error"]
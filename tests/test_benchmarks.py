@@ -0,0 +1,49 @@
+import json
+import os
+import urllib.request
+
+from autoscraper.core.scraper import scrape_with_pagination
+from benchmarks.fixtures import FixtureSite, FakeCohere
+from benchmarks.run import compare_results, run_suite
+
+
+def test_fixture_site_paginates(fast_scheduler):
+    with FixtureSite(pages=3, items=4) as site:
+        rows = scrape_with_pagination(site.url, {"data": site.text_selector}, site.pagination_selector,
+                                      max_pages=10, scheduler=fast_scheduler)
+    assert len(rows) == 12 and all(r["data"] for r in rows)
+
+
+def test_fake_cohere_endpoints():
+    with FakeCohere(dim=8) as fake:
+        def post(endpoint, payload):
+            req = urllib.request.Request(f"{fake.base_url}/v1/{endpoint}", data=json.dumps(payload).encode(),
+                                         headers={"Content-Type": "application/json"}, method="POST")
+            with urllib.request.urlopen(req) as resp:
+                return json.load(resp)
+
+        embed = post("embed", {"texts": ["a", "b", "a"], "model": "embed-english-light-v3.0"})
+        chat = post("chat", {"message": "love love truth", "model": "command-r-plus"})
+        generate = post("generate", {"prompt": "hello world"})
+    assert len(embed["embeddings"]) == 3 and len(embed["embeddings"][0]) == 8
+    assert embed["embeddings"][0] == embed["embeddings"][2] != embed["embeddings"][1]
+    assert "love" in chat["text"] and chat["meta"]["billed_units"]["input_tokens"] == 3
+    assert generate["generations"][0]["text"]
+    assert fake.calls == {"embed": 1, "chat": 1, "generate": 1}
+
+
+def test_suite_results_and_compare(monkeypatch):
+    monkeypatch.delenv("COHERE_BASE_URL", raising=False)
+    monkeypatch.setenv("HF_HUB_OFFLINE", "0")
+    doc = run_suite(["small"], ["scrape_with_pagination", "run_eda"], repeat=1, warmup=False)
+    assert [r["status"] for r in doc["results"]] == ["ok", "ok"]
+    # the offline stand-in's settings do not outlive the suite
+    assert "COHERE_BASE_URL" not in os.environ and os.environ["HF_HUB_OFFLINE"] == "0"
+
+    slower = json.loads(json.dumps(doc))
+    for r in slower["results"]:
+        r["best_s"] = r["best_s"] * 2 + 1
+    slower["results"][1]["status"] = "failed"
+    verdicts = [r["verdict"] for r in compare_results(doc, slower)]
+    assert verdicts == ["regression", "regression"]
+    assert [r["verdict"] for r in compare_results(slower, doc)][0] == "improvement"
@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+from autoscraper.core.delta import DeltaState, scrape_delta, row_key, row_hash, state_path_for
+
+
+def _run(base, state_path, scheduler):
+    return scrape_delta(f"{base}/page/1", {"item": ".item"}, "a.next", max_pages=5,
+                        state_path=str(state_path), scheduler=scheduler)
+
+
+def test_second_run_skips_unchanged_pages(local_site, tmp_path, fast_scheduler):
+    state_path = tmp_path / "state.json"
+    first = _run(local_site, state_path, fast_scheduler)
+    assert len(first["added"]) == 6 and first["pages_fetched"] == 3
+
+    second = _run(local_site, state_path, fast_scheduler)
+    assert second["added"] == second["changed"] == second["removed"] == []
+    assert second["pages_skipped"] == 3 and second["unchanged"] == 6
+
+
+def test_delta_reports_added_and_removed_rows(local_site, tmp_path, fast_scheduler):
+    state_path = tmp_path / "state.json"
+    _run(local_site, state_path, fast_scheduler)
+
+    # pretend page 2 used to look different and a since-deleted row existed
+    state = json.loads(state_path.read_text())
+    page2 = state["pages"][f"{local_site}/page/2"]
+    page2["fingerprint"] = "stale"
+    dropped = page2["keys"].pop()
+    del state["rows"][dropped]
+    gone = {"item": "gone"}
+    state["rows"][row_key(gone)] = {"hash": "x", "row": gone}
+    state_path.write_text(json.dumps(state))
+
+    delta = _run(local_site, state_path, fast_scheduler)
+    assert delta["added"] == [{"item": "b2"}]
+    assert delta["removed"] == [gone]
+    assert delta["pages_fetched"] == 1 and delta["pages_skipped"] == 2
+
+
+def test_delta_reports_changed_rows_by_key(local_site, tmp_path, fast_scheduler):
+    selectors = {"item": ".item", "link": "a.next"}
+
+    def run():
+        return scrape_delta(f"{local_site}/page/1", selectors, "a.next", max_pages=5,
+                            state_path=str(tmp_path / "state.json"), scheduler=fast_scheduler)
+
+    run()
+    # pretend a1's link column used to hold something else
+    state = json.loads((tmp_path / "state.json").read_text())
+    state["pages"][f"{local_site}/page/1"]["fingerprint"] = "stale"
+    old = {"item": "a1", "link": "old"}
+    state["rows"][row_key(old, ["item"])] = {"hash": row_hash(old), "row": old}
+    (tmp_path / "state.json").write_text(json.dumps(state))
+
+    delta = run()
+    assert delta["changed"] == [{"item": "a1", "link": "next"}]
+    assert delta["added"] == delta["removed"] == []
+
+
+def test_unsaved_run_leaves_state_untouched(local_site, tmp_path, fast_scheduler):
+    state_path = tmp_path / "state.json"
+    pending = scrape_delta(f"{local_site}/page/1", {"item": ".item"}, "a.next", max_pages=5,
+                           state_path=str(state_path), scheduler=fast_scheduler, save=False)
+    assert not state_path.exists() and len(pending["added"]) == 6
+
+    # the caller commits once its own work is done
+    DeltaState(str(state_path)).save(**pending["state"])
+    assert _run(local_site, state_path, fast_scheduler)["unchanged"] == 6
+
+
+def test_duplicate_keys_are_kept_apart(local_site, tmp_path, fast_scheduler):
+    # "home" only matches once per page, so every page repeats the same two keys
+    selectors = {"item": ".item", "home": "a[href='/page/1']"}
+
+    def run():
+        return scrape_delta(f"{local_site}/page/1", selectors, "a.next", max_pages=5,
+                            state_path=str(tmp_path / "state.json"), key_fields=["home"], scheduler=fast_scheduler)
+
+    first = run()
+    assert len(first["added"]) == len(first["rows"]) == 6 and first["duplicate_keys"] == 4
+
+    # re-parsing one page among reused ones must map its rows to the same keys
+    state = json.loads((tmp_path / "state.json").read_text())
+    state["pages"][f"{local_site}/page/2"]["fingerprint"] = "stale"
+    (tmp_path / "state.json").write_text(json.dumps(state))
+    second = run()
+    assert second["added"] == second["changed"] == second["removed"] == []
+    assert second["unchanged"] == 6 and second["pages_fetched"] == 1
+
+
+def test_key_fields_must_be_selectors(tmp_path):
+    with pytest.raises(ValueError):
+        state_path_for(str(tmp_path), "http://example.test", {"item": ".item"}, key_fields=["nope"])
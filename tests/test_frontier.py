@@ -0,0 +1,30 @@
+from autoscraper.core.frontier import BloomFilter, CrawlFrontier, crawl, normalize_url
+
+
+def test_bloom_filter_dedups():
+    bloom = BloomFilter(1000, 0.01)
+    assert bloom.add("http://a/1")
+    assert not bloom.add("http://a/1")
+    assert "http://a/1" in bloom
+    assert "http://a/2" not in bloom
+
+
+def test_frontier_round_robin_and_normalisation():
+    frontier = CrawlFrontier(1000)
+    assert frontier.add("http://A.test:80/x#frag")
+    assert not frontier.add("http://a.test/x")
+    frontier.add("http://a.test/y")
+    frontier.add("http://b.test/z")
+    hosts = [frontier.pop()[0].split("/")[2] for _ in range(3)]
+    assert hosts[:2] == ["a.test", "b.test"]
+    assert frontier.pop() is None
+    assert normalize_url("HTTPS://Ex.com:443") == "https://ex.com/"
+
+
+def test_crawl_follows_pagination_once_per_url(local_site, fast_scheduler):
+    base = local_site
+    config = {"url": f"{base}/page/1", "selectors": {"item": ".item"}, "pagination": "a.next",
+              "max_depth": 1, "link_patterns": ["/page/"]}
+    pages = list(crawl([config], workers=2, scheduler=fast_scheduler))
+    assert sorted(url for _, url, _ in pages) == [f"{base}/page/{n}" for n in (1, 2, 3)]
+    assert sum(len(rows) for _, _, rows in pages) == 6
@@ -0,0 +1,45 @@
+import json
+import logging
+
+from autoscraper.utils import logger
+
+
+def _record(msg, *args):
+    record = logging.LogRecord("autoscraper", logging.INFO, __file__, 1, msg, args, None)
+    record.template = msg
+    return record
+
+
+def test_rate_limit_filter_reports_suppressed_repeats():
+    limiter = logger.RateLimitFilter(burst=3, window=60)
+    passed = [limiter.filter(_record("Fetching %s", f"u{i}")) for i in range(10)]
+    assert passed == [True] * 3 + [False] * 7
+    assert limiter.filter(_record("Other message"))
+
+    limiter.window = 0
+    record = _record("Fetching %s", "u10")
+    assert limiter.filter(record) and record.suppressed == 7
+
+
+def test_json_lines_and_lazy_formatting(tmp_path):
+    class Expensive:
+        formatted = 0
+
+        def __str__(self):
+            Expensive.formatted += 1
+            return "expensive"
+
+    path = tmp_path / "log.jsonl"
+    try:
+        logger.configure(level="INFO", json_path=str(path))
+        logger.debug("skipped %s", Expensive())
+        logger.info("Scraped %d rows from %s", 3, "site", site="site", rows=3)
+        logger.flush()
+    finally:
+        logger.configure()
+    assert Expensive.formatted == 0
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(lines) == 1
+    assert lines[0]["msg"] == "Scraped 3 rows from site"
+    assert lines[0]["level"] == "INFO" and lines[0]["rows"] == 3
+    assert lines[0]["func"] == "test_json_lines_and_lazy_formatting"
@@ -0,0 +1,80 @@
+import pytest
+
+from autoscraper.core.memo import Stage, StageCache
+
+
+def _pipeline(tmp_path, calls, factor, run_id):
+    artifacts = {}
+    raw = tmp_path / f"raw_{run_id}.txt"
+    scaled = tmp_path / f"scaled_{run_id}.txt"
+
+    def make_raw():
+        calls.append("raw")
+        raw.write_text("1 2 3")
+
+    def scale():
+        calls.append("scale")
+        nums = open(artifacts["raw"]).read().split()
+        scaled.write_text(" ".join(str(int(n) * factor) for n in nums))
+
+    stages = [
+        Stage("raw", [], {"source": "fixed"}, {"raw": str(raw)}, make_raw),
+        Stage("scale", ["raw"], {"factor": factor}, {"scaled": str(scaled)}, scale),
+    ]
+    return stages, artifacts
+
+
+def test_rerun_reuses_unchanged_stages(tmp_path):
+    cache_path = str(tmp_path / ".stage_cache.json")
+    calls = []
+    stages, artifacts = _pipeline(tmp_path, calls, 2, "a")
+    StageCache(cache_path).run(stages, artifacts=artifacts)
+    assert calls == ["raw", "scale"]
+
+    calls.clear()
+    stages, artifacts = _pipeline(tmp_path, calls, 2, "b")
+    StageCache(cache_path).run(stages, artifacts=artifacts)
+    assert calls == []
+    assert artifacts["scaled"].endswith("scaled_a.txt")
+
+    calls.clear()
+    stages, artifacts = _pipeline(tmp_path, calls, 3, "c")
+    report = StageCache(cache_path).explain(stages)
+    assert [r["status"] for r in report] == ["hit", "run"]
+    assert "factor: 2 -> 3" in report[1]["reason"]
+    StageCache(cache_path).run(stages, artifacts=artifacts)
+    assert calls == ["scale"]
+    assert (tmp_path / "scaled_c.txt").read_text() == "3 6 9"
+
+
+def test_rerun_from_forces_downstream(tmp_path):
+    cache_path = str(tmp_path / ".stage_cache.json")
+    calls = []
+    stages, artifacts = _pipeline(tmp_path, calls, 2, "a")
+    StageCache(cache_path).run(stages, artifacts=artifacts)
+    calls.clear()
+    stages, artifacts = _pipeline(tmp_path, calls, 2, "b")
+    StageCache(cache_path).run(stages, rerun_from="raw", artifacts=artifacts)
+    assert calls == ["raw", "scale"]
+
+
+def test_expired_entries_rerun(tmp_path):
+    cache_path = str(tmp_path / ".stage_cache.json")
+    calls = []
+    stages, artifacts = _pipeline(tmp_path, calls, 2, "a")
+    StageCache(cache_path).run(stages, artifacts=artifacts)
+    calls.clear()
+    stages, artifacts = _pipeline(tmp_path, calls, 2, "b")
+    stages[0].max_age = 0
+    cache = StageCache(cache_path)
+    for entry in cache.manifest["stages"]["raw"].values():
+        entry["created_at"] = "2000-01-01T00:00:00"
+    assert "older than" in cache.explain(stages)[0]["reason"]
+    cache.run(stages, artifacts=artifacts)
+    assert calls == ["raw"]  # same raw content, so scale is still reused
+
+
+def test_unknown_rerun_from_is_rejected(tmp_path):
+    stages, artifacts = _pipeline(tmp_path, [], 2, "a")
+    with pytest.raises(ValueError):
+        StageCache(str(tmp_path / ".stage_cache.json")).run(stages, rerun_from="scael", artifacts=artifacts)
@@ -0,0 +1,70 @@
+import copy
+import json
+
+from autoscraper.core.batch import run_batch
+from autoscraper.core.scraper import scrape_with_pagination
+from autoscraper.utils.metrics import Histogram, Metrics, get_metrics, export_run
+
+
+def test_histogram_quantiles():
+    hist = Histogram()
+    for v in [0.02] * 90 + [2.0] * 10:
+        hist.observe(v)
+    summary = hist.summary()
+    assert summary["count"] == 100 and summary["max"] == 2.0
+    assert 0.01 <= summary["p50"] <= 0.025
+    assert 1 <= summary["p99"] <= 2.0
+
+
+def test_histogram_diff_drops_earlier_max():
+    hist = Histogram()
+    hist.observe(20.0)
+    before = copy.deepcopy(hist)
+    for _ in range(10):
+        hist.observe(0.3)
+    summary = hist.minus(before).summary()
+    assert summary["count"] == 10 and summary["max"] is None
+    assert 0.25 <= summary["p99"] <= 0.5
+
+
+def test_report_covers_only_the_run(tmp_path):
+    metrics = Metrics()
+    metrics.inc("cache_requests_total", cache="stage", result="hit")
+    since = metrics.snapshot()
+    with metrics.stage("eda"):
+        metrics.inc("cache_requests_total", cache="stage", result="hit")
+        metrics.inc("cache_requests_total", cache="stage", result="miss")
+        metrics.observe("llm_latency_seconds", 0.4, model="m", op="chat")
+        metrics.inc("llm_calls_total", model="m", op="chat")
+        metrics.inc("llm_tokens_total", 120, model="m", kind="input")
+    report = metrics.report(since)
+    assert report["cache"] == {"stage": {"hits": 1, "misses": 1, "hit_rate": 0.5}}
+    assert report["stages"]["eda"]["runs"] == 1
+    assert report["llm"]["m"]["input_tokens"] == 120 and report["llm"]["m"]["latency_s"]["count"] == 1
+
+    prom = metrics.to_prometheus()
+    assert 'autoscraper_cache_requests_total{cache="stage",result="hit"} 2' in prom
+    assert 'autoscraper_llm_latency_seconds_bucket{model="m",op="chat",le="+Inf"} 1' in prom
+
+
+def test_fetches_are_recorded(local_site, tmp_path, monkeypatch, fast_scheduler):
+    prom_path = tmp_path / "autoscraper.prom"
+    monkeypatch.setenv("AUTOSCRAPER_PROM_TEXTFILE", str(prom_path))
+    since = get_metrics().snapshot()
+    scrape_with_pagination(f"{local_site}/page/1", {"item": ".item"}, "a.next", max_pages=3, scheduler=fast_scheduler)
+
+    report = export_run(str(tmp_path / "run_metrics.json"), since)
+    assert report["fetch"]["requests"] == 3
+    assert report["fetch"]["by_status"] == {"200": 3}
+    assert report["fetch"]["bytes"] > 0
+    assert json.loads((tmp_path / "run_metrics.json").read_text())["fetch"]["requests"] == 3
+    assert "autoscraper_fetch_latency_seconds_count" in prom_path.read_text()
+
+
+def test_batch_writes_run_metrics(local_site, tmp_path):
+    configs = [("site", {"url": f"{local_site}/page/1", "selectors": {"item": ".item"},
+                         "pagination": "a.next", "max_pages": 2})]
+    run_batch(configs, str(tmp_path), workers=1, fmt="csv")
+    report = json.loads((tmp_path / "run_metrics.json").read_text())
+    assert report["stages"]["batch"]["runs"] == 1
+    assert report["fetch"]["requests"] == 2
@@ -0,0 +1,111 @@
+import datetime
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import types
+import urllib.error
+import urllib.request
+
+import pytest
+
+from autoscraper.core.service import JOB_HANDLERS, CronSchedule, Service, make_server
+
+
+def test_cron_schedule_matching():
+    every_15 = CronSchedule("*/15 9-17 * * 1-5")
+    assert every_15.matches(datetime.datetime(2026, 10, 19, 9, 30))  # Monday
+    assert not every_15.matches(datetime.datetime(2026, 10, 19, 9, 31))
+    assert not every_15.matches(datetime.datetime(2026, 10, 18, 9, 30))  # Sunday
+    assert CronSchedule("0 0 * * 7").matches(datetime.datetime(2026, 10, 18, 0, 0))
+    with pytest.raises(ValueError):
+        CronSchedule("61 * * * *")
+
+
+def test_submit_applies_backpressure_when_queue_full(tmp_path):
+    service = Service(workers=1, queue_size=1, output_root=str(tmp_path))
+    service.submit("config", {"config": {}})
+    with pytest.raises(queue.Full):
+        service.submit("config", {"config": {}})
+    with pytest.raises(ValueError):
+        service.submit("nope")
+
+
+def test_api_runs_config_job(local_site, tmp_path):
+    service = Service(workers=1, output_root=str(tmp_path))
+    server = make_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    service.start()
+    api = f"http://127.0.0.1:{server.server_port}"
+    try:
+        job = {"kind": "config", "params": {"config": {
+            "name": "site", "url": f"{local_site}/page/1", "selectors": {"item": ".item"}, "max_pages": 1}}}
+        req = urllib.request.Request(f"{api}/jobs", data=json.dumps(job).encode(), method="POST")
+        with urllib.request.urlopen(req) as resp:
+            assert resp.status == 202
+            job_id = json.load(resp)["id"]
+
+        for _ in range(100):
+            with urllib.request.urlopen(f"{api}/jobs/{job_id}") as resp:
+                status = json.load(resp)
+            if status["status"] in ("done", "failed"):
+                break
+            time.sleep(0.05)
+        assert status["status"] == "done", status
+        assert status["result"]["rows"] == 2
+
+        with pytest.raises(urllib.error.HTTPError) as exc:
+            urllib.request.urlopen(f"{api}/jobs/missing")
+        assert exc.value.code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.stop()
+
+
+def test_stop_cancels_queued_jobs_without_waiting(tmp_path, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setitem(JOB_HANDLERS, "slow", lambda params, output_dir: release.wait(5))
+    service = Service(workers=1, queue_size=2, output_root=str(tmp_path))
+    service.start()
+    running = service.submit("slow")
+    for _ in range(100):
+        if service.get(running["id"])["status"] == "running":
+            break
+        time.sleep(0.01)
+    queued = service.submit("slow")
+    service.submit("slow")
+
+    start = time.monotonic()
+    service.stop(timeout=0.5)
+    assert time.monotonic() - start < 2
+    release.set()
+    assert service.get(queued["id"])["status"] == "cancelled"
+    assert service.stats()["cancelled"] == 2
+
+
+def test_config_job_name_cannot_leave_job_folder(local_site, tmp_path):
+    job_dir = tmp_path / "job"
+    job_dir.mkdir()
+    config = {"name": "../../escaped", "url": f"{local_site}/page/1", "selectors": {"item": ".item"}, "max_pages": 1}
+    result = JOB_HANDLERS["config"]({"config": config}, str(job_dir))
+    assert os.path.dirname(result["output"]) == str(job_dir)
+    assert os.path.exists(result["output"])
+
+
+def test_randomurl_jobs_share_cache_dir(tmp_path, monkeypatch):
+    calls = []
+    fake = types.ModuleType("autoscraper.randomurl_cli")
+    fake.run_randomurl = lambda **kwargs: calls.append(kwargs) or {}
+    monkeypatch.setitem(sys.modules, "autoscraper.randomurl_cli", fake)
+    params = {"url": "http://example.com", "selector": ".q"}
+    JOB_HANDLERS["randomurl"](params, str(tmp_path / "job1"))
+    JOB_HANDLERS["randomurl"](params, str(tmp_path / "job2"))
+    JOB_HANDLERS["randomurl"]({**params, "selector": ".other"}, str(tmp_path / "job3"))
+    assert [c["folder"] for c in calls] == [str(tmp_path / f"job{i}") for i in (1, 2, 3)]
+    assert calls[0]["cache_dir"] == calls[1]["cache_dir"] != calls[2]["cache_dir"]
+    assert calls[0]["cache_dir"].startswith(str(tmp_path / "randomurl"))
+    with pytest.raises(ValueError):
+        JOB_HANDLERS["randomurl"]({**params, "folder": "elsewhere"}, str(tmp_path / "job4"))
@@ -0,0 +1,23 @@
+import pytest
+
+from autoscraper.core.storage import FORMATS, format_of, with_format, read_table, write_table
+
+ROWS = [
+    {"name": "a", "body": "line one\nline two, with comma", "predicted_categories": ["life", "love"]},
+    {"name": "b", "body": "x" * 5000, "predicted_categories": []},
+]
+
+
+@pytest.mark.parametrize("fmt", list(FORMATS))
+def test_round_trip_keeps_text_and_lists(fmt, tmp_path):
+    path = str(tmp_path / ("out" + FORMATS[fmt]))
+    write_table(ROWS, path)
+    df = read_table(path)
+    assert df.to_dict(orient="records") == ROWS
+
+
+def test_format_helpers():
+    assert format_of("runs/x.JSONL.ZST") == "jsonl.zst"
+    assert with_format("runs/out.csv.gz", "parquet") == "runs/out.parquet"
+    with pytest.raises(ValueError):
+        format_of("out.xlsx")
@@ -0,0 +1,90 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from bs4 import BeautifulSoup
+from lxml import etree
+
+from autoscraper.core.scraper import scrape_with_pagination
+from autoscraper.core.streaming import compile_selector, element_text, stream_page
+from benchmarks.fixtures import FixtureSite
+
+HTML = """<html><body><div id="main">
+<ul class="list"><li class="x">one <b>bold</b></li><li>two<!-- c --></li><li class="x"><span>three</span></li></ul>
+<div class="card"><h2>Title</h2><p>first</p><p class="x">second <script>var a;</script>tail</p></div>
+<p class="x">outside</p><a class="next" href="/p/2">next</a>
+</div><footer><p>foot</p></footer></body></html>"""
+
+SELECTORS = ["li.x", "ul > li", "#main p", "div.card p", "h2 + p", "h2 ~ p.x", "li:nth-child(2)",
+             "li:first-child", "p:nth-of-type(2)", "a[href^='/p']", "div:not(.card) > p", "span, b"]
+
+
+def _stream_matches(css):
+    xpath = compile_selector(css)
+    parser = etree.HTMLPullParser(events=("end",))
+    parser.feed(HTML)
+    parser.close()
+    return [element_text(el) for _, el in parser.read_events() if isinstance(el.tag, str) and xpath(el)]
+
+
+@pytest.mark.parametrize("css", SELECTORS)
+def test_matches_beautifulsoup(css):
+    soup = BeautifulSoup(HTML, "lxml")
+    expected = [el.get_text(strip=True) for el in soup.select(css)]
+    # streaming reports elements in closing order, so compare as multisets
+    assert sorted(_stream_matches(css)) == sorted(expected)
+
+
+def test_forward_looking_selectors_rejected():
+    with pytest.raises(ValueError):
+        compile_selector("li:last-child")
+
+
+def test_stream_page_stops_early(fast_scheduler):
+    with FixtureSite(pages=2, items=3000) as site:
+        full = stream_page(site.url, {"data": site.text_selector}, site.pagination_selector, scheduler=fast_scheduler)
+        limited = stream_page(site.url, {"data": site.text_selector}, site.pagination_selector,
+                              item_limit=5, scheduler=fast_scheduler, chunk_size=4096)
+        marker = stream_page(site.url, {"data": site.text_selector}, stop_selector=".quote:nth-child(10)",
+                             scheduler=fast_scheduler, chunk_size=4096)
+    assert len(full["columns"]["data"]) == 3000 and not full["stopped_early"]
+    assert full["next"].endswith("/page/2/")
+    # the next link sits after the items, so the item limit alone cannot stop early here
+    assert limited["columns"]["data"] == full["columns"]["data"][:5]
+    assert marker["stopped_early"] and marker["bytes"] < full["bytes"] / 10
+    assert marker["columns"]["data"] == full["columns"]["data"][:10]
+
+
+def test_scrape_with_pagination_streaming(local_site, fast_scheduler):
+    buffered = scrape_with_pagination(f"{local_site}/page/1", {"item": ".item"}, "a.next", max_pages=5,
+                                      scheduler=fast_scheduler)
+    streamed = scrape_with_pagination(f"{local_site}/page/1", {"item": ".item"}, "a.next", max_pages=5,
+                                      scheduler=fast_scheduler, stream=True)
+    limited = scrape_with_pagination(f"{local_site}/page/1", {"item": ".item"}, "a.next", max_pages=5,
+                                     scheduler=fast_scheduler, item_limit=1)
+    assert streamed == buffered and len(buffered) == 6
+    assert [r["item"] for r in limited] == ["a1", "a2", "a3"]
+
+
+def test_empty_body_yields_no_rows(fast_scheduler):
+    class Empty(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = b"  \n"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Empty)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/"
+        assert scrape_with_pagination(url, {"a": "p"}, stream=True, scheduler=fast_scheduler) == []
+        assert stream_page(url, {"a": "p"}, scheduler=fast_scheduler)["columns"] == {"a": []}
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,43 @@
+from autoscraper.core.throttle import HostScheduler, parse_retry_after
+
+
+def test_parse_retry_after_seconds_and_garbage():
+    assert parse_retry_after("5") == 5.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+
+
+def test_additive_increase_on_healthy_responses():
+    sched = HostScheduler(initial_rate=100, max_rate=1000, respect_robots=False)
+    for _ in range(10):
+        with sched.slot("http://example.test/a") as slot:
+            slot.record(200, {})
+    state = sched.snapshot()["example.test"]
+    assert state["concurrency"] > 1
+    assert state["rate"] > 100
+
+
+def test_multiplicative_decrease_and_retry_after_on_429():
+    sched = HostScheduler(initial_rate=100, initial_concurrency=4, respect_robots=False)
+    with sched.slot("http://example.test/a") as slot:
+        slot.record(429, {"Retry-After": "30"})
+    state = sched.snapshot()["example.test"]
+    assert state["concurrency"] == 2
+    assert state["rate"] == 50
+    assert sched.limit("example.test") == 0
+
+
+def test_successes_after_errors_do_not_cut_limits():
+    sched = HostScheduler(initial_rate=8, max_rate=8, initial_concurrency=8, respect_robots=False)
+    for status in (500, 500, 200, 200, 200):
+        with sched.slot("http://example.test/a") as slot:
+            slot.record(status, {})
+    state = sched.snapshot()["example.test"]
+    assert state["concurrency"] == 4
+    assert state["rate"] == 4
+
+
+def test_crawl_delay_caps_rate():
+    sched = HostScheduler(initial_rate=5, respect_robots=False)
+    sched.set_crawl_delay("example.test", 2.0)
+    assert sched.snapshot()["example.test"]["rate"] == 0.5